@@ -0,0 +1,203 @@
+from typing import Dict, Mapping, Union
+from dataclasses import dataclass
+
+import numpy as np
+
+# the stat schema is defined in player_stats, re-exported for existing callers
+from player_stats import CSV_COLUMNS, STAT_FIELDS, TIME_CSV_COLUMN, TIME_FIELD  # noqa: F401
+from player_stats import array_columns, from_columns, has_time_column
+
+@dataclass
+class EnemyKillStats:
+    terminid_kills: int
+    automaton_kills: int
+    illuminate_kills: int
+    friendly_kills: int
+
+    @property
+    def total_kills(self):
+        return self.terminid_kills + self.automaton_kills + self.illuminate_kills
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "Terminid Kills": self.terminid_kills,
+            "Automaton Kills": self.automaton_kills,
+            "Illuminate Kills": self.illuminate_kills,
+            "Friendly Kills": self.friendly_kills
+        }
+
+# display label -> metrics table column, in chart order
+EFFICIENCY_METRICS = {
+    "Kills per mission": 'kills_per_mission',
+    "Stratagems per Mission": 'stratagems_per_mission',
+    "Objectives Per Mission": 'objectives_per_mission',
+    "Deaths per Mission": 'deaths_per_mission',
+    "Accuracy(%)": 'accuracy',
+    "Samples per Mission": 'samples_per_mission',
+    "XP per Mission": 'xp_per_mission',
+}
+COMBAT_STYLE_METRICS = {
+    "Regular Kills": 'regular_kills',
+    "Grenade Kills": 'grenade_kills',
+    "Melee Kills": 'melee_kills',
+    "Eagle Kills": 'eagle_kills',
+}
+STRATAGEM_METRICS = {
+    "Orbital Strikes": 'orbitals_per_mission',
+    "Defensive Tools": 'defensive_per_mission',
+    "Eagle Support": 'eagles_per_mission',
+}
+TIME_METRICS = {
+    "Kills per Hour": 'kills_per_hour',
+    "XP per Hour": 'xp_per_hour',
+    "Samples per Hour": 'samples_per_hour',
+}
+
+ArrayLike = Union[np.ndarray, list]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """numerator / denominator where valid, 0 elsewhere (no divide-by-zero warnings)"""
+    out = np.zeros(len(denominator), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=valid)
+    return out
+
+
+def compute_metrics(columns: Mapping[str, ArrayLike]) -> Dict[str, np.ndarray]:
+    """
+    Compute every analysis metric for many players at once.
+
+    Args:
+        columns: one array per field in STAT_FIELDS, all the same length, plus
+                 optionally TIME_FIELD in seconds for the per-hour metrics
+    Returns:
+        metrics table columns (see EFFICIENCY_METRICS and friends) as arrays;
+        per-mission values are 0 for players without missions, accuracy is 0
+        without shots fired, per-hour values are 0 without mission time
+    """
+    col = {field: np.asarray(columns[field], dtype=np.int64) for field in STAT_FIELDS}
+    missions = col['missions_played']
+    has_missions = missions > 0
+    has_shots = has_missions & (col['shots_fired'] > 0)
+
+    total_kills = col['terminid_kills'] + col['automaton_kills'] + col['illuminate_kills']
+    samples_per_mission = _ratio(col['samples_collected'], missions, has_missions)
+    xp_per_mission = _ratio(col['total_xp'], missions, has_missions)
+
+    metrics = {
+        'total_kills': total_kills,
+        # efficiency
+        'kills_per_mission': _ratio(total_kills, missions, has_missions),
+        'stratagems_per_mission': _ratio(col['total_stratagems'], missions, has_missions),
+        'objectives_per_mission': _ratio(col['objectives_completed'], missions, has_missions),
+        'deaths_per_mission': _ratio(col['deaths'], missions, has_missions),
+        'accuracy': _ratio(col['shots_hit'], col['shots_fired'], has_shots) * 100,
+        'samples_per_mission': samples_per_mission,
+        'xp_per_mission': xp_per_mission,
+        # combat style
+        'regular_kills': total_kills - col['grenade_kills'] - col['melee_kills'] - col['eagle_kills'],
+        'grenade_kills': col['grenade_kills'],
+        'melee_kills': col['melee_kills'],
+        'eagle_kills': col['eagle_kills'],
+        # stratagems
+        'orbitals_per_mission': _ratio(col['orbitals_used'], missions, has_missions),
+        'defensive_per_mission': _ratio(col['defensive_stratagems'], missions, has_missions),
+        'eagles_per_mission': _ratio(col['eagles_used'], missions, has_missions),
+        # success
+        'mission_success_rate': _ratio(col['missions_won'], missions, has_missions) * 100,
+        'extraction_rate': _ratio(col['successful_extractions'], missions, has_missions) * 100,
+        'objective_completion_rate': _ratio(col['objectives_completed'], missions, has_missions),
+    }
+
+    if TIME_FIELD in columns:
+        seconds = np.asarray(columns[TIME_FIELD], dtype=np.int64)
+        has_time = seconds > 0
+        # NO_TIME rows (-1) get 0 hours, like rows with no time at all
+        hours = np.where(has_time, seconds, 0) / 3600
+        metrics['mission_hours'] = hours
+        metrics['kills_per_hour'] = _ratio(total_kills, hours, has_time)
+        metrics['xp_per_hour'] = _ratio(col['total_xp'], hours, has_time)
+        metrics['samples_per_hour'] = _ratio(col['samples_collected'], hours, has_time)
+    return metrics
+
+
+def analyze_batch(data):
+    """
+    Analyze many players in one pass.
+
+    Args:
+        data: a DataFrame (e.g. pd.read_csv of a career stats export) or a
+              mapping of NumPy arrays
+    Returns:
+        DataFrame with one row per player and one column per metric
+    """
+    import pandas as pd  # only the table form needs pandas
+
+    index = data.index if isinstance(data, pd.DataFrame) else None
+    columns = array_columns(from_columns(data), with_time=has_time_column(data))
+    return pd.DataFrame(compute_metrics(columns), index=index)
+
+
+class CombatStatsAnalysis:
+    """Single-player view over one row of the batch metrics."""
+
+    def __init__(self, stats_dict: dict, metrics: Mapping[str, object] = None):
+        self.stats = stats_dict
+        if metrics is None:
+            fields = STAT_FIELDS + [TIME_FIELD] if TIME_FIELD in stats_dict else STAT_FIELDS
+            table = compute_metrics({field: [stats_dict[field]] for field in fields})
+            metrics = {name: values[0] for name, values in table.items()}
+        # plain python numbers, so templates and json see int/float like before
+        self.metrics = {name: value.item() if hasattr(value, 'item') else value
+                        for name, value in metrics.items()}
+
+        self.total_kills = self.metrics['total_kills']
+        self.efficiency_metrics = self.calculate_efficiency_metrics()
+        self.combat_style = self.calculate_combat_stats()
+        self.stratagem_efficiency = self.calculate_stratagem_efficiency()
+        self.time_metrics = self.calculate_time_metrics()
+
+        self.mission_success_rate = self.metrics['mission_success_rate']
+        self.extraction_rate = self.metrics['extraction_rate']
+        self.objective_completion_rate = self.metrics['objective_completion_rate']
+        self.samples_per_mission = self.metrics['samples_per_mission']
+        self.xp_per_mission = self.metrics['xp_per_mission']
+
+    @classmethod
+    def from_batch(cls, stats_dict: dict, metrics_table, row: int) -> 'CombatStatsAnalysis':
+        """view row `row` of an analyze_batch/compute_metrics result without recomputing it"""
+        # per column, so integer columns are not upcast like a mixed-dtype .iloc[row] would
+        if hasattr(metrics_table, 'iloc'):
+            metrics = {name: metrics_table[name].iat[row] for name in metrics_table.columns}
+        else:
+            metrics = {name: values[row] for name, values in metrics_table.items()}
+        return cls(stats_dict, metrics)
+
+    def to_dict(self) -> dict:
+        """everything the analysis computes, JSON-ready (/api/analyze, report summaries)"""
+        return {
+            'total_kills': self.total_kills,
+            'efficiency_metrics': self.efficiency_metrics,
+            'combat_style': self.combat_style,
+            'stratagem_efficiency': self.stratagem_efficiency,
+            'time_metrics': self.time_metrics,
+            'mission_success_rate': self.mission_success_rate,
+            'extraction_rate': self.extraction_rate,
+            'objective_completion_rate': self.objective_completion_rate,
+            'samples_per_mission': self.samples_per_mission,
+            'xp_per_mission': self.xp_per_mission,
+        }
+
+    def calculate_efficiency_metrics(self) -> Dict[str, float]:
+        return {label: self.metrics[column] for label, column in EFFICIENCY_METRICS.items()}
+
+    def calculate_combat_stats(self) -> Dict[str, float]:
+        return {label: self.metrics[column] for label, column in COMBAT_STYLE_METRICS.items()}
+
+    def calculate_stratagem_efficiency(self) -> Dict[str, float]:
+        return {label: self.metrics[column] for label, column in STRATAGEM_METRICS.items()}
+
+    def calculate_time_metrics(self) -> Dict[str, float]:
+        """per-hour rates, empty when the stats carry no mission time"""
+        return {label: self.metrics[column] for label, column in TIME_METRICS.items()
+                if column in self.metrics}
@@ -1,277 +1,692 @@
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, abort, Response, stream_template, stream_with_context, g, got_request_exception
 import base64
-import io
+import itertools
+import json
+import logging
 import os
+import threading
+import time
 # import secrets
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Tuple
 from werkzeug.utils import secure_filename
 from waitress import serve
 
+from analysis import CombatStatsAnalysis
+from batch import DEFAULT_CHUNK_ROWS, read_stat_chunks, stream_batch
+from player_stats import PlayerStats, from_columns
+from snapshots import SnapshotStore, delta_stats
+from percentiles import PercentileIndex
+from chart_specs import chart_specs
+from image_formats import IMAGE_FORMATS, ImageOptions, negotiate_format
+from render_cache import CachedFigure, CachedRender, Flight, RenderCache, SingleFlight, stats_key
+from jobs import FINISHED, DONE, JobQueue, QueueFull
+from rendering import FIGURE_INPUTS, RenderEngine, chart_module, figure_inputs, render_namespace
+from warmup import Warmup
+from prefork import Supervisor, serve_worker
+import metrics
+# pandas, matplotlib and seaborn (charts, compare) are imported on first use or by
+# the warm-up, so `/` is served right after start; see benchmarks/bench_startup.py
+
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-key-only')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024 # 16mb file size
+# metric dicts are in chart order, keep it in JSON responses
+app.json.sort_keys = False
 
 # uploads folder -> maybe for future use
 UPLOAD_FOLDER = 'uploads'
 
-@dataclass
-class EnemyKillStats:
-    terminid_kills: int
-    automaton_kills: int
-    illuminate_kills: int
-    friendly_kills: int
-
-    @property
-    def total_kills(self):
-        return self.terminid_kills + self.automaton_kills + self.illuminate_kills
-
-    def to_dict(self) -> Dict[str, int]:
-        return {
-            "Terminid Kills": self.terminid_kills,
-            "Automaton Kills": self.automaton_kills,
-            "Illuminate Kills": self.illuminate_kills,
-            "Friendly Kills": self.friendly_kills
-        }
-
-class CombatStatsAnalysis:
-    def __init__(self, stats_dict: dict):
-        self.stats = stats_dict
-        self.total_kills = (stats_dict['terminid_kills'] + 
-                           stats_dict['automaton_kills'] + 
-                           stats_dict['illuminate_kills'])
-        
-        self.efficiency_metrics = self.calculate_efficiency_metrics()
-        self.combat_style = self.calculate_combat_stats()
-        self.stratagem_efficiency = self.calculate_stratagem_efficiency()
-        
-        missions = stats_dict['missions_played']
-        self.mission_success_rate = stats_dict['missions_won'] / missions * 100 if missions > 0 else 0
-        self.extraction_rate = stats_dict['successful_extractions'] / missions * 100 if missions > 0 else 0
-        self.objective_completion_rate = stats_dict['objectives_completed'] / missions if missions > 0 else 0
-        self.samples_per_mission = stats_dict['samples_collected'] / missions if missions > 0 else 0
-        self.xp_per_mission = stats_dict['total_xp'] / missions if missions > 0 else 0
-
-    def calculate_efficiency_metrics(self) -> Dict[str, float]:
-        missions = self.stats['missions_played']
-        if missions == 0:
-            return {key: 0 for key in ["Kills per mission", "Stratagems per Mission", "Objectives Per Mission", "Deaths per Mission", "Accuracy(%)", "Samples per Mission", "XP per Mission"]}
-        
-        accuracy = (self.stats['shots_hit'] / self.stats['shots_fired'] * 100) if self.stats['shots_fired'] > 0 else 0
-        
-        return {
-            "Kills per mission": self.total_kills / missions,
-            "Stratagems per Mission": self.stats['total_stratagems'] / missions,
-            "Objectives Per Mission": self.stats['objectives_completed'] / missions,
-            "Deaths per Mission": self.stats['deaths'] / missions,
-            "Accuracy(%)": accuracy,
-            "Samples per Mission": self.stats['samples_collected'] / missions,
-            "XP per Mission": self.stats['total_xp'] / missions
-        }
-
-    def calculate_combat_stats(self) -> Dict[str, float]:
-        return {
-            "Regular Kills": self.total_kills - self.stats['grenade_kills'] - self.stats['melee_kills'] - self.stats['eagle_kills'],
-            "Grenade Kills": self.stats['grenade_kills'],
-            "Melee Kills": self.stats['melee_kills'],
-            "Eagle Kills": self.stats['eagle_kills']
-        }
-
-    def calculate_stratagem_efficiency(self) -> Dict[str, float]:
-        missions = self.stats['missions_played']
-        if missions == 0:
-            return {"Orbital Strikes": 0, "Defensive Tools": 0, "Eagle Support": 0}
-        
-        return {
-            "Orbital Strikes": self.stats['orbitals_used'] / missions,
-            "Defensive Tools": self.stats['defensive_stratagems'] / missions,
-            "Eagle Support": self.stats['eagles_used'] / missions
-        }
-
-def add_value_labels(ax: plt.Axes, format_str: str = '{:.2f}') -> None:
-    """Add labels to the end of each bar in a bar chart."""
-    for rect in ax.patches:
-        height = rect.get_height()
-        if height > 0:  # only add label if there's a value
-            ax.text(rect.get_x() + rect.get_width() / 2, height,
-                    format_str.format(height),
-                    ha='center', va='bottom')
-
-def create_visualizations(stats_dict: dict) -> List[str]:
-    """Create all visualizations and return them as base64 encoded strings"""
-    plt.style.use('default')
-    images = []
-    
-    analysis = CombatStatsAnalysis(stats_dict)
-    
-    # 1. kill distribution Chart
-    fig1 = plt.figure(figsize=(12, 8))
-    fig1.suptitle("Enemy Kill Distribution Analysis", fontsize=16)
-
-    # bar plot
-    ax1 = plt.subplot(2, 1, 1)
-    enemy_stats = EnemyKillStats(
-        terminid_kills=stats_dict['terminid_kills'],
-        automaton_kills=stats_dict['automaton_kills'],
-        illuminate_kills=stats_dict['illuminate_kills'],
-        friendly_kills=stats_dict['friendly_kills']
-    )
-    
-    kills_data = enemy_stats.to_dict()
-    kills_df = pd.DataFrame(list(kills_data.items()), columns=['Enemy Type', 'Kills'])
-    
-    if kills_df['Kills'].sum() > 0:  # only create chart if there are kills
-        sns.barplot(x='Enemy Type', y='Kills', data=kills_df, ax=ax1)
-        ax1.set_title("Kills by Enemy Type")
-        plt.setp(ax1.get_xticklabels(), rotation=45, ha='right')
-        add_value_labels(ax1, format_str='{:.0f}')
-
-        # Pie chart
-        ax2 = plt.subplot(2, 1, 2)
-        kill_values = [v for v in kills_data.values() if v > 0]
-        kill_labels = [k for k, v in kills_data.items() if v > 0]
-        
-        if kill_values:
-            ax2.pie(kill_values, labels=kill_labels, autopct='%1.1f%%')
-            ax2.set_title("Enemy Kills Distribution")
-    
-    plt.tight_layout()
-    images.append(fig_to_base64(fig1))
-    plt.close(fig1)
-    
-    #2. main Analysis Chart
-    fig2, axs = plt.subplots(3, 1, figsize=(14, 12))
-    fig2.suptitle("Combat Performance Analysis", fontsize=16)
-
-    # efficiency metrics
-    metrics_df = pd.DataFrame(list(analysis.efficiency_metrics.items()),
-                              columns=['Metric', 'Value'])
-    sns.barplot(data=metrics_df, x='Metric', y='Value', ax=axs[0])
-    axs[0].set_title('Performance Metrics per Mission')
-    axs[0].tick_params(axis='x', rotation=45)
-    add_value_labels(axs[0])
-
-    #combat style
-    combat_df = pd.DataFrame(list(analysis.combat_style.items()),
-                             columns=['Style', 'Kills'])
-    sns.barplot(data=combat_df, x='Style', y='Kills', ax=axs[1])
-    axs[1].set_title('Combat Style Distribution')
-    axs[1].tick_params(axis='x', rotation=45)
-    add_value_labels(axs[1], '{:,.0f}')
-
-    #stratagem efficiency
-    stratagem_df = pd.DataFrame(list(analysis.stratagem_efficiency.items()),
-                                columns=['Stratagem', 'Usage per Mission'])
-    sns.barplot(data=stratagem_df, x='Stratagem', y='Usage per Mission', ax=axs[2])
-    axs[2].set_title('Stratagem Usage per Mission')
-    axs[2].tick_params(axis='x', rotation=45)
-    add_value_labels(axs[2])
-
-    fig2.tight_layout(rect=[0, 0, 1, 0.97])
-    images.append(fig_to_base64(fig2))
-    plt.close(fig2)
-    
-    #3. rewards and success metrics
-    fig3, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    fig3.suptitle("Rewards and Mission Success Metrics", fontsize=16)
-    
-    # rewards bar chart
-    metrics = {
-        'Samples per Mission': analysis.samples_per_mission,
-        'XP per Mission (÷100)': analysis.xp_per_mission / 100
+# rendered results cache, keyed by a hash of the normalized stats (0 disables)
+app.config['RENDER_CACHE_BYTES'] = int(os.environ.get('RENDER_CACHE_BYTES', 64 * 1024 * 1024))
+
+# per-figure images keyed by only the fields each figure is drawn from, so changing
+# one field and resubmitting redraws just the figures that use it (0 disables)
+app.config['FIGURE_CACHE_BYTES'] = int(os.environ.get('FIGURE_CACHE_BYTES', 32 * 1024 * 1024))
+
+# 'inline' embeds charts as base64 data URIs, 'url' links to /chart/<key>/<n>.<ext>
+app.config['CHART_MODE'] = os.environ.get('CHART_MODE', 'inline')
+# charts are content addressed, so browsers and proxies may keep them for a year
+CHART_MAX_AGE = 365 * 24 * 60 * 60
+
+# chart image format: png, png8 (palette), webp (lossless), svg, or 'auto' for webp when
+# the client accepts it and png8 otherwise; `image_format` in a request overrides it
+app.config['IMAGE_FORMAT'] = os.environ.get('IMAGE_FORMAT', 'png')
+app.config['IMAGE_DPI'] = int(os.environ.get('IMAGE_DPI', 100))
+# zlib level 0-9 of png/png8 (scaled to webp's 0-6 effort)
+app.config['IMAGE_COMPRESSION'] = int(os.environ.get('IMAGE_COMPRESSION', 6))
+# palette size of png8
+app.config['PNG_COLORS'] = int(os.environ.get('PNG_COLORS', 256))
+
+# 'seaborn' builds each figure from scratch, 'template' reuses pre-built figures
+app.config['RENDER_BACKEND'] = os.environ.get('RENDER_BACKEND', 'seaborn')
+# worker processes that render the figures in parallel (0 renders on the request thread)
+app.config['RENDER_WORKERS'] = int(os.environ.get('RENDER_WORKERS', 0))
+
+# rows per parsed chunk of a bulk CSV upload to /analyze/batch
+app.config['BATCH_CHUNK_ROWS'] = int(os.environ.get('BATCH_CHUNK_ROWS', DEFAULT_CHUNK_ROWS))
+
+# SQLite snapshot store (see snapshots.py) behind /snapshots/...; unset disables the routes
+app.config['SNAPSHOT_DB'] = os.environ.get('SNAPSHOT_DB')
+
+# population CSV that results are ranked against; unset falls back to the latest
+# snapshot of every player in SNAPSHOT_DB, or no percentiles at all
+app.config['PERCENTILE_DATA'] = os.environ.get('PERCENTILE_DATA')
+
+# most players /compare draws into one set of charts
+app.config['COMPARE_MAX_PLAYERS'] = int(os.environ.get('COMPARE_MAX_PLAYERS', 50))
+
+# add a Server-Timing header with the per-stage durations to every response
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '0').lower() in ('1', 'true', 'yes')
+
+# warm up imports, fonts and the renderer on a background thread at start; /readyz
+# answers 503 until it is done. 0 loads everything on the first request instead
+app.config['WARMUP'] = os.environ.get('WARMUP', '1').lower() in ('1', 'true', 'yes')
+
+# waitress handler threads; figures are built without pyplot so threads do not share state
+app.config['WAITRESS_THREADS'] = int(os.environ.get('WAITRESS_THREADS', 4))
+# serving processes: above 1, a supervisor preloads the app and forks this many waitress
+# workers sharing the listening socket, since rendering is bound by the GIL (POSIX only)
+app.config['WEB_PROCESSES'] = int(os.environ.get('WEB_PROCESSES', 1))
+# recycle a worker process whose RSS grows past this many MiB (0 never does)
+app.config['WORKER_MAX_RSS_MB'] = int(os.environ.get('WORKER_MAX_RSS_MB', 0))
+# seconds a stopping worker may spend finishing the requests it already has
+app.config['WORKER_DRAIN_SECONDS'] = float(os.environ.get('WORKER_DRAIN_SECONDS', 30))
+
+def image_options_for(image_format: str) -> ImageOptions:
+    """the configured dpi, compression and palette in the given format; ValueError if invalid"""
+    return ImageOptions(format=image_format, dpi=app.config['IMAGE_DPI'],
+                        compression=app.config['IMAGE_COMPRESSION'], colors=app.config['PNG_COLORS'])
+
+# fail at start on a bad image configuration, not on the first request
+image_options_for(negotiate_format(None, (), app.config['IMAGE_FORMAT']))
+
+# job mode: /analyze queues the render and answers right away with a page that follows
+# the job (/jobs/<id>), so a burst of renders cannot take every request thread
+app.config['JOB_MODE'] = os.environ.get('JOB_MODE', '0').lower() in ('1', 'true', 'yes')
+# renders that may wait for a job worker; beyond that /analyze answers 503 with Retry-After
+app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('JOB_QUEUE_SIZE', 16))
+# threads that run queued renders (each renders one result at a time)
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 1))
+# seconds a finished job's result can still be fetched
+app.config['JOB_RESULT_TTL'] = float(os.environ.get('JOB_RESULT_TTL', 300))
+# longest an SSE stream of /jobs/<id>/events stays open; EventSource reconnects after it
+SSE_MAX_SECONDS = 60
+
+# stream fresh results pages: the summary cards go out at once, each chart as soon as it
+# is drawn; a `stream` form or query value of 1/0 overrides it per request
+app.config['STREAM_RESULTS'] = os.environ.get('STREAM_RESULTS', '0').lower() in ('1', 'true', 'yes')
+
+render_cache = RenderCache(app.config['RENDER_CACHE_BYTES'])
+figure_cache = RenderCache(app.config['FIGURE_CACHE_BYTES'])
+# identical stats submitted at the same time (a shared stat block) wait for one render
+render_flight = SingleFlight()
+render_engine = RenderEngine(app.config['RENDER_WORKERS'], app.config['RENDER_BACKEND'])
+warmup = Warmup()
+job_queue = JobQueue(app.config['JOB_QUEUE_SIZE'], app.config['JOB_WORKERS'], app.config['JOB_RESULT_TTL'])
+
+def collect_cache_metrics() -> None:
+    for cache, events, size in ((render_cache, metrics.RENDER_CACHE_EVENTS, metrics.RENDER_CACHE_BYTES),
+                                (figure_cache, metrics.FIGURE_CACHE_EVENTS, metrics.FIGURE_CACHE_BYTES)):
+        stats = cache.stats()
+        for event, count in (('hit', stats['hits']), ('miss', stats['misses']), ('eviction', stats['evictions'])):
+            events.set(count, event=event)
+        size.set(stats['bytes'])
+
+metrics.REGISTRY.add_collector(collect_cache_metrics)
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_start = time.perf_counter()
+    g.metrics_token = metrics.begin_request()
+    metrics.REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.metrics_start
+    metrics.REQUEST_SECONDS.observe(elapsed, endpoint=request.endpoint or 'unmatched', method=request.method,
+                                    status=response.status_code)
+    if app.config['SERVER_TIMING']:
+        timings = metrics.request_timings() + [('total', elapsed)]
+        response.headers['Server-Timing'] = metrics.server_timing(timings)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'metrics_token' in g:
+        metrics.REQUESTS_IN_FLIGHT.dec()
+        metrics.end_request(g.metrics_token)
+
+def record_error(endpoint: str, error: Exception) -> None:
+    """count and log an exception that is answered with an error page instead of a 500"""
+    metrics.ERRORS.inc(endpoint=endpoint, type=type(error).__name__)
+    app.logger.warning("%s failed: %s: %s", endpoint, type(error).__name__, error)
+
+def count_unhandled_error(sender, exception, **extra) -> None:
+    metrics.ERRORS.inc(endpoint=request.endpoint or 'unmatched', type=type(exception).__name__)
+
+got_request_exception.connect(count_unhandled_error, app)
+
+def get_snapshot_store() -> SnapshotStore:
+    if not app.config['SNAPSHOT_DB'] or not os.path.exists(app.config['SNAPSHOT_DB']):
+        abort(404)
+    return SnapshotStore(app.config['SNAPSHOT_DB'])
+
+_percentile_index = None
+_percentile_snapshot_mtime = None
+_percentile_lock = threading.Lock()
+
+def get_percentile_index() -> PercentileIndex:
+    """
+    population index, loaded on first use; without PERCENTILE_DATA it follows SNAPSHOT_DB,
+    re-adding the players whose latest snapshot changed whenever the file has been written since
+    """
+    global _percentile_index, _percentile_snapshot_mtime
+    with _percentile_lock:
+        if _percentile_index is None:
+            if app.config['PERCENTILE_DATA']:
+                _percentile_index = PercentileIndex.from_csv(app.config['PERCENTILE_DATA'])
+            else:
+                _percentile_index = PercentileIndex()
+        path = app.config['SNAPSHOT_DB']
+        if not app.config['PERCENTILE_DATA'] and path and os.path.exists(path):
+            # stat before reading, so a write racing the read is picked up next time
+            mtime = os.stat(path).st_mtime_ns
+            if mtime != _percentile_snapshot_mtime:
+                _percentile_index.add_snapshots(SnapshotStore(path).latest())
+                _percentile_snapshot_mtime = mtime
+        return _percentile_index
+
+def rank_summary(summary_stats: dict) -> Dict[str, float]:
+    """percentile of each efficiency / per-hour metric; kept out of the render cache as the population grows"""
+    index = get_percentile_index()
+    return index.percentiles({**summary_stats['efficiency_metrics'], **summary_stats['time_metrics']})
+
+def warmup_steps() -> dict:
+    """the slow first-use work, in the order the warm-up runs it"""
+    def import_modules():
+        # the matplotlib and template backends serve /analyze without pandas or seaborn,
+        # /compare then loads them on first use
+        chart_module(render_engine.backend)
+        if render_engine.backend == 'seaborn':
+            import compare  # noqa: F401 - pandas, seaborn
+
+    return {
+        'imports': import_modules,
+        'render': render_engine.warm_up,
+        'percentiles': get_percentile_index,
     }
-    metrics_df = pd.DataFrame(list(metrics.items()), columns=['Metric', 'Value'])
-    
-    sns.barplot(x='Metric', y='Value', data=metrics_df, ax=ax1)
-    ax1.set_title('Reward Metrics per Mission')
-    
-    for i, v in enumerate(metrics_df['Value']):
-        if metrics_df['Metric'].iloc[i] == 'XP per Mission (÷100)':
-            ax1.text(i, v + max(metrics_df['Value']) * 0.01, f"{v*100:.1f}", ha='center')
-        else:
-            ax1.text(i, v + max(metrics_df['Value']) * 0.01, f"{v:.1f}", ha='center')
-    
-    # Mission success pie chart
-    missions_won = stats_dict['missions_won']
-    missions_failed = stats_dict['missions_played'] - missions_won
-    
-    if stats_dict['missions_played'] > 0:
-        labels = ['Successful Missions', 'Failed Missions']
-        sizes = [missions_won, missions_failed]
-        colors = ['#4CAF50', '#F44336']
-        ax2.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors)
-        ax2.set_title('Mission Success Rate')
-    
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    images.append(fig_to_base64(fig3))
-    plt.close(fig3)
-    
-    return images
-
-def fig_to_base64(fig):
-    """convert matplotlib figure to base64 string"""
-    img = io.BytesIO()
-    fig.savefig(img, format='png', bbox_inches='tight', dpi=100)
-    img.seek(0)
-    img_b64 = base64.b64encode(img.getvalue()).decode()
-    return img_b64
+
+def image_options() -> ImageOptions:
+    """image options of the current request: `image_format` field, else the configured or negotiated format"""
+    accepted = [mimetype for mimetype, quality in request.accept_mimetypes if quality > 0 and '*' not in mimetype]
+    return image_options_for(negotiate_format(request.values.get('image_format'), accepted,
+                                              app.config['IMAGE_FORMAT']))
+
+def normalize_stats(stats_dict: dict) -> Dict[str, int]:
+    """
+    Parse a form, JSON object or CSV row into the stats dict (see PlayerStats.to_dict).
+
+    Keys may be field names or export headers; missing or blank counters are 0.
+    An optional `mission_time` ("931:20:00" or "38d 19h 20m 0s") is added as
+    TIME_FIELD seconds; without it the result has no time field at all.
+    """
+    return PlayerStats.from_mapping(stats_dict).to_dict()
+
+def build_summary_stats(analysis: CombatStatsAnalysis) -> dict:
+    """summary values shown in the cards and table of results.html"""
+    return {
+        'total_kills': analysis.total_kills,
+        'mission_success_rate': analysis.mission_success_rate,
+        'extraction_rate': analysis.extraction_rate,
+        'samples_per_mission': analysis.samples_per_mission,
+        'xp_per_mission': analysis.xp_per_mission,
+        'efficiency_metrics': analysis.efficiency_metrics,
+        'time_metrics': analysis.time_metrics
+    }
+
+def render_key(stats_dict: dict, image: ImageOptions = ImageOptions()) -> str:
+    """render cache key of a normalized stats dict in the given image options"""
+    return stats_key(stats_dict, namespace=render_namespace(render_engine.backend, image))
+
+def iter_figures(stats_dict: dict, analysis: CombatStatsAnalysis, image: ImageOptions) -> Iterator[bytes]:
+    """every figure's image in page order, each as soon as it is available, drawing only those not in the figure cache"""
+    if not figure_cache.enabled:
+        yield from render_engine.render_iter(stats_dict, analysis, image)
+        return
+
+    namespace = render_namespace(render_engine.backend, image)
+    keys = {name: stats_key(figure_inputs(name, stats_dict), namespace=f"{namespace}:{name}")
+            for name in FIGURE_INPUTS}
+    cached = {name: figure_cache.get(key) for name, key in keys.items()}
+    missing = [name for name, entry in cached.items() if entry is None]
+    drawn = render_engine.render_iter(stats_dict, analysis, image, missing)
+    for name in FIGURE_INPUTS:
+        if cached[name] is not None:
+            yield cached[name].image
+            continue
+        img = next(drawn)
+        figure_cache.put(keys[name], CachedFigure(img))
+        yield img
+
+def render_figures(stats_dict: dict, analysis: CombatStatsAnalysis, image: ImageOptions) -> List[bytes]:
+    """every figure's image, drawing only those whose inputs are not in the figure cache"""
+    return list(iter_figures(stats_dict, analysis, image))
+
+def get_rendered_results(stats_dict: dict, image: ImageOptions = ImageOptions()) -> Tuple[str, CachedRender]:
+    """
+    Return (key, rendered results) for a normalized stats dict,
+    rendering only when the cache does not already hold them and no
+    identical render is already running.
+    """
+    key = render_key(stats_dict, image)
+    if render_cache.enabled:
+        entry = render_cache.get(key)
+        if entry is not None:
+            return key, entry
+
+    def render() -> CachedRender:
+        with metrics.stage('analysis'):
+            analysis = CombatStatsAnalysis(stats_dict)
+            summary_stats = build_summary_stats(analysis)
+        entry = CachedRender(
+            images=render_figures(stats_dict, analysis, image),
+            summary_stats=summary_stats,
+            format=image.format,
+        )
+        # cached before the flight ends, so a later request finds one or the other
+        if render_cache.enabled:
+            render_cache.put(key, entry)
+        return entry
+
+    entry, shared = render_flight.do(key, render)
+    if shared:
+        metrics.RENDERS_COALESCED.inc()
+    return key, entry
+
+def chart_urls(key: str, result: CachedRender) -> List[str]:
+    """/chart urls of a cached render's images"""
+    ext = IMAGE_FORMATS[result.format][1]
+    return [url_for('chart', key=key, index=i, ext=ext) for i in range(len(result.images))]
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def results_page(key: str, result: CachedRender) -> str:
+    """results.html of a render, with its charts linked or inlined"""
+    with metrics.stage('percentiles'):
+        percentiles = rank_summary(result.summary_stats)
+
+    # chart urls need the cache to serve the images from
+    if app.config['CHART_MODE'] == 'url' and key in render_cache:
+        with metrics.stage('template'):
+            return render_template('results.html', chart_urls=chart_urls(key, result),
+                                   stats=result.summary_stats, percentiles=percentiles)
+
+    images = [base64.b64encode(img).decode() for img in result.images]
+    with metrics.stage('template'):
+        return render_template('results.html', images=images, image_type=IMAGE_FORMATS[result.format][0],
+                               stats=result.summary_stats, percentiles=percentiles)
+
+def wants_stream() -> bool:
+    value = request.values.get('stream')
+    if value is None:
+        return app.config['STREAM_RESULTS']
+    return value.lower() in ('1', 'true', 'yes')
+
+def stream_results(key: str, flight: Flight, stats_dict: dict, image: ImageOptions) -> Response:
+    """
+    results.html sent while it is generated: everything before the charts right away,
+    then each chart as it is drawn. The render leads `flight`, so identical requests
+    arriving meanwhile wait for its result instead of rendering again.
+    """
+    try:
+        with metrics.stage('analysis'):
+            analysis = CombatStatsAnalysis(stats_dict)
+            summary_stats = build_summary_stats(analysis)
+        with metrics.stage('percentiles'):
+            percentiles = rank_summary(summary_stats)
+    except BaseException as e:
+        flight.fail(e)
+        raise
+    chart_errors = []
+
+    def charts() -> Iterator[str]:
+        images = []
+        try:
+            for img in iter_figures(stats_dict, analysis, image):
+                images.append(img)
+                yield base64.b64encode(img).decode()
+        except Exception as e:
+            # the status line is already sent, so the page reports the failure itself
+            record_error('analyze', e)
+            chart_errors.append(str(e))
+            flight.fail(e)
+            return
+        entry = CachedRender(images=images, summary_stats=summary_stats, format=image.format)
+        if render_cache.enabled:
+            render_cache.put(key, entry)
+        flight.finish(entry)
+
+    response = Response(stream_template('results.html', images=charts(), image_type=image.mimetype,
+                                        stats=summary_stats, percentiles=percentiles, chart_errors=chart_errors))
+    # a client gone before the last chart: whoever waits on the flight renders it instead
+    response.call_on_close(flight.abandon)
+    response.headers['X-Accel-Buffering'] = 'no'  # reverse proxies must not hold the pieces back
+    return response
+
+def wants_json() -> bool:
+    return request.accept_mimetypes.best == 'application/json'
+
+def job_links(job_id: str) -> dict:
+    return {
+        'status_url': url_for('job_status', job_id=job_id),
+        'events_url': url_for('job_events', job_id=job_id),
+        'result_url': url_for('job_result', job_id=job_id),
+    }
+
+def job_accepted(job) -> Response:
+    """202 for a queued job: its status as JSON, or a page that follows it until the result is ready"""
+    links = job_links(job.id)
+    if wants_json():
+        response = jsonify({**job.to_dict(), **links})
+    else:
+        response = Response(render_template('job.html', job=job.to_dict(), **links))
+    response.status_code = 202
+    response.headers['Location'] = links['status_url']
+    response.headers['Retry-After'] = '1'
+    return response
+
+def queue_full(e: QueueFull):
+    """503 with Retry-After instead of queueing more renders than the server can keep up with"""
+    record_error('analyze', e)
+    headers = {'Retry-After': str(e.retry_after)}
+    if wants_json():
+        return jsonify(error=str(e), retry_after=e.retry_after), 503, headers
+    return render_template('error.html', error=str(e)), 503, headers
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
         # get form data
-        stats_dict = {
-            'missions_played': int(request.form.get('missions_played', 0)),
-            'missions_won': int(request.form.get('missions_won', 0)),
-            'successful_extractions': int(request.form.get('successful_extractions', 0)),
-            'objectives_completed': int(request.form.get('objectives_completed', 0)),
-            'terminid_kills': int(request.form.get('terminid_kills', 0)),
-            'automaton_kills': int(request.form.get('automaton_kills', 0)),
-            'illuminate_kills': int(request.form.get('illuminate_kills', 0)),
-            'friendly_kills': int(request.form.get('friendly_kills', 0)),
-            'grenade_kills': int(request.form.get('grenade_kills', 0)),
-            'melee_kills': int(request.form.get('melee_kills', 0)),
-            'eagle_kills': int(request.form.get('eagle_kills', 0)),
-            'shots_fired': int(request.form.get('shots_fired', 0)),
-            'shots_hit': int(request.form.get('shots_hit', 0)),
-            'deaths': int(request.form.get('deaths', 0)),
-            'samples_collected': int(request.form.get('samples_collected', 0)),
-            'total_xp': int(request.form.get('total_xp', 0)),
-            'total_stratagems': int(request.form.get('total_stratagems', 0)),
-            'orbitals_used': int(request.form.get('orbitals_used', 0)),
-            'defensive_stratagems': int(request.form.get('defensive_stratagems', 0)),
-            'eagles_used': int(request.form.get('eagles_used', 0))
-        }
-        
-        # create visualizations
-        images = create_visualizations(stats_dict)
-        
-        # calculate summary stats
+        with metrics.stage('parse_form'):
+            stats_dict = normalize_stats(request.form)
+            image = image_options()
+
+        key = render_key(stats_dict, image)
+        cached = render_cache.enabled and key in render_cache
+        # cached results are served right away in job mode too, only renders are queued
+        if app.config['JOB_MODE'] and not cached:
+            return job_accepted(job_queue.submit(get_rendered_results, stats_dict, image))
+        # a render another request is already running is waited for and shared instead
+        if wants_stream() and not cached:
+            flight = render_flight.claim(key)
+            if flight is not None:
+                return stream_results(key, flight, stats_dict, image)
+
+        # render (or reuse) visualizations and summary stats
+        key, result = get_rendered_results(stats_dict, image)
+        return results_page(key, result)
+
+    except QueueFull as e:
+        return queue_full(e)
+    except Exception as e:
+        record_error('analyze', e)
+        return render_template('error.html', error=str(e))
+
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)  # unknown, or finished longer than JOB_RESULT_TTL ago
+    return job
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """poll a render job: its status, time queued / running, and where to fetch the result"""
+    job = get_job(job_id)
+    response = jsonify({**job.to_dict(), **job_links(job.id)})
+    if job.status not in FINISHED:
+        response.headers['Retry-After'] = '1'
+    return response
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """the job's status as server-sent events, one per change, ending when it is finished"""
+    job = get_job(job_id)
+    links = job_links(job.id)  # url_for needs the request context, which is gone while streaming
+
+    def stream():
+        yield 'retry: 1000\n\n'
+        deadline = time.monotonic() + SSE_MAX_SECONDS
+        status = None
+        while True:
+            if job.status != status:
+                status = job.status
+                yield f"event: status\ndata: {json.dumps({**job.to_dict(), **links})}\n\n"
+                if status in FINISHED:
+                    return
+            elif time.monotonic() > deadline:
+                return  # frees the handler thread, the client reconnects
+            else:
+                yield ': keep-alive\n\n'
+            job_queue.wait_change(job, status, timeout=15)
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # no proxy buffering of the stream
+    return response
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """results page of a finished job; 202 and the waiting page while it is still queued or running"""
+    job = get_job(job_id)
+    if job.status == DONE:
+        key, result = job.result
+        return results_page(key, result)
+    if job.status in FINISHED:
+        return render_template('error.html', error=job.error), 500
+    return job_accepted(job)
+
+@app.route('/api/analyze', methods=['POST'])
+def api_analyze():
+    """
+    The analysis as JSON plus a Vega-Lite spec per chart, so the browser draws
+    the charts and the server does no matplotlib work.
+
+    Stats are sent as a JSON object or form fields (same names as /analyze).
+    `?png=1` also renders the charts (in the `image_format` of the request,
+    png by default): urls when the render cache holds them, base64 otherwise.
+    """
+    try:
+        if request.is_json:
+            data = request.get_json(silent=True)
+            if data is None:
+                raise ValueError("the request body is not valid JSON")
+        else:
+            data = request.form
+        if not isinstance(data, Mapping):
+            raise TypeError(f"expected a JSON object of stats, got {type(data).__name__}")
+        stats_dict = normalize_stats(data)
+        image = image_options()
+    except (TypeError, ValueError) as e:
+        record_error('api_analyze', e)
+        return jsonify(error=str(e)), 400
+
+    with metrics.stage('analysis'):
         analysis = CombatStatsAnalysis(stats_dict)
-        
-        summary_stats = {
-            'total_kills': analysis.total_kills,
-            'mission_success_rate': analysis.mission_success_rate,
-            'extraction_rate': analysis.extraction_rate,
-            'samples_per_mission': analysis.samples_per_mission,
-            'xp_per_mission': analysis.xp_per_mission,
-            'efficiency_metrics': analysis.efficiency_metrics
-        }
-        
-        return render_template('results.html', images=images, stats=summary_stats)
-        
+        summary = analysis.to_dict()
+    with metrics.stage('chart_specs'):
+        specs = chart_specs(stats_dict, analysis)
+    payload = {
+        'stats': stats_dict,
+        'analysis': summary,
+        'percentiles': rank_summary(summary),
+        'charts': specs,
+    }
+
+    if request.args.get('png', '').lower() in ('1', 'true', 'yes'):
+        key, result = get_rendered_results(stats_dict, image)
+        payload['image_type'] = image.mimetype
+        if key in render_cache:
+            payload['chart_urls'] = chart_urls(key, result)
+        else:
+            payload['images'] = [base64.b64encode(img).decode() for img in result.images]
+    return jsonify(payload)
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch_upload():
+    """
+    Analyze a CSV of many players (26Feb2025.csv layout) and stream the
+    per-player metrics plus squad aggregates back as NDJSON (default) or CSV.
+
+    The CSV is sent as a multipart `file` field or as the raw request body.
+    """
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'csv' if request.accept_mimetypes.best == 'text/csv' else 'ndjson'
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify(error=f"unsupported format {fmt!r}, use ndjson or csv"), 400
+
+    # multipart uploads are spooled to disk by werkzeug, raw bodies are read as they arrive
+    upload = request.files.get('file')
+    source = upload.stream if upload is not None else request.stream
+
+    chunks = read_stat_chunks(source, app.config['BATCH_CHUNK_ROWS'])
+    try:
+        # check the header on the first chunk while an error status can still be sent
+        first = next(chunks)
+        from_columns(first)  # the parser stream_batch uses, so bad cells fail here too
+    except StopIteration:
+        return jsonify(error="empty CSV upload"), 400
+    except (KeyError, ValueError) as e:
+        record_error('analyze_batch_upload', e)
+        return jsonify(error=e.args[0] if e.args else str(e)), 400
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    body = stream_batch(itertools.chain([first], chunks), fmt)
+    return Response(stream_with_context(body), mimetype=mimetype)
+
+@app.route('/snapshots/latest')
+def snapshots_latest():
+    """latest stored snapshot of every player"""
+    return jsonify(get_snapshot_store().latest())
+
+@app.route('/snapshots/<player>/delta')
+def snapshot_delta(player):
+    """
+    Analyze only what happened between two snapshots of a player
+    (?from=YYYY-MM-DD&to=YYYY-MM-DD, default: the two most recent).
+    """
+    delta = get_snapshot_store().delta(player, request.args.get('from'), request.args.get('to'))
+    if delta is None:
+        abort(404)
+    try:
+        stats_dict = delta_stats(delta)
+        image = image_options()
+        key, result = get_rendered_results(stats_dict, image)
+        images = [base64.b64encode(img).decode() for img in result.images]
+        period = f"{player}: {delta['from']} to {delta['to']}"
+        return render_template('results.html', images=images, image_type=image.mimetype,
+                               stats=result.summary_stats, period=period)
     except Exception as e:
+        record_error('snapshot_delta', e)
         return render_template('error.html', error=str(e))
 
+@app.route('/compare', methods=['POST'])
+def compare():
+    """
+    Compare every player of an uploaded CSV (multipart `file` or raw body),
+    optionally only the comma separated names in `players`.
+    """
+    from charts import fig_to_base64
+    from compare import build_comparison, comparison_frame, read_players
+
+    try:
+        upload = request.files.get('file')
+        source = upload.stream if upload is not None else request.stream
+        wide = comparison_frame(read_players(source))
+
+        wanted = [name.strip() for name in request.values.get('players', '').split(',') if name.strip()]
+        if wanted:
+            wide = wide[wide['Player'].isin(wanted)]
+        if wide.empty:
+            raise ValueError("no players to compare")
+        if len(wide) > app.config['COMPARE_MAX_PLAYERS']:
+            raise ValueError(f"too many players ({len(wide)}), compare at most {app.config['COMPARE_MAX_PLAYERS']}")
+
+        image = image_options()
+        images = [fig_to_base64(fig, image) for fig in build_comparison(wide)]
+        return render_template('compare.html', images=images, image_type=image.mimetype,
+                               players=wide.to_dict('records'))
+    except Exception as e:
+        record_error('compare', e)
+        return render_template('error.html', error=str(e))
+
+@app.route('/healthz')
+def healthz():
+    """liveness: the process is up and answering"""
+    return jsonify(status='ok')
+
+@app.route('/readyz')
+def readyz():
+    """readiness: 503 while the start-up warm-up is still running"""
+    status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """request, stage, render, cache and error metrics in the Prometheus text format"""
+    return Response(metrics.REGISTRY.expose(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/chart/<key>/<int:index>.<ext>')
+def chart(key, index, ext):
+    """serve one cached chart with a strong ETag and long-lived caching"""
+    entry = render_cache.get(key, record=False)
+    if entry is None or index >= len(entry.images):
+        abort(404)
+    mimetype, extension = IMAGE_FORMATS[entry.format]
+    if ext != extension:
+        abort(404)
+
+    response = Response(entry.images[index], mimetype=mimetype)
+    response.set_etag(f"{key}-{index}")
+    response.cache_control.public = True
+    response.cache_control.max_age = CHART_MAX_AGE
+    response.cache_control.immutable = True
+    # answers If-None-Match with a 304 and no body
+    return response.make_conditional(request)
+
+def preload() -> None:
+    """the warm-up, run in the supervisor so every forked worker starts with it done"""
+    steps = warmup_steps()
+    if render_engine.parallel:
+        del steps['render']  # a process pool does not survive a fork, each worker starts its own
+    warmup.run(steps)
+
+def serve_forked(sock) -> None:
+    """one worker process of the supervisor"""
+    if render_engine.parallel and app.config['WARMUP']:
+        warmup.start({'render': render_engine.warm_up})
+    try:
+        serve_worker(app, sock, threads=app.config['WAITRESS_THREADS'],
+                     drain_seconds=app.config['WORKER_DRAIN_SECONDS'])
+    finally:
+        render_engine.shutdown()
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    serve(app, host='0.0.0.0', port=port)
+    if app.config['WEB_PROCESSES'] > 1 and hasattr(os, 'fork'):
+        logging.basicConfig(level=logging.INFO)
+        if app.config['JOB_MODE'] or app.config['CHART_MODE'] == 'url':
+            # job results and linked charts live in the worker that rendered them
+            app.logger.warning("JOB_MODE and CHART_MODE=url need WEB_PROCESSES=1, follow-up requests may 404")
+        Supervisor(serve_forked, host='0.0.0.0', port=port, processes=app.config['WEB_PROCESSES'],
+                   preload=preload if app.config['WARMUP'] else None,
+                   max_rss_bytes=app.config['WORKER_MAX_RSS_MB'] * 1024 * 1024,
+                   drain_seconds=app.config['WORKER_DRAIN_SECONDS']).run()
+    else:
+        if app.config['WEB_PROCESSES'] > 1:
+            app.logger.warning("WEB_PROCESSES needs os.fork, serving from one process")
+        if app.config['WARMUP']:
+            warmup.start(warmup_steps())
+        serve(app, host='0.0.0.0', port=port, threads=app.config['WAITRESS_THREADS'])
@@ -0,0 +1,136 @@
+import json
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from analysis import compute_metrics
+from player_stats import COUNT_FIELDS, FIELDS, TIME_FIELD, array_columns, from_columns, has_time_column
+
+# rows parsed per chunk of an uploaded CSV; memory per request scales with this, not the upload
+DEFAULT_CHUNK_ROWS = 10_000
+
+# optional player name columns of a stats CSV: copied through to the batch output rows, and
+# what snapshot ingest keys players by
+PLAYER_COLUMNS = ('player', 'Player', 'Player Name', 'Name')
+
+
+def read_stat_chunks(source, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator['pd.DataFrame']:
+    """
+    Parse a career stats CSV from a file-like object in chunks of `chunk_rows`.
+
+    Columns may use the form field names or the export headers of 26Feb2025.csv;
+    empty cells count as 0.
+    """
+    import pandas as pd  # imported on first use, so the app starts without it
+
+    for chunk in pd.read_csv(source, chunksize=chunk_rows, skipinitialspace=True):
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        yield chunk
+
+
+def player_column(chunk: 'pd.DataFrame') -> Optional[str]:
+    """the first of PLAYER_COLUMNS present in the chunk, if any"""
+    for name in PLAYER_COLUMNS:
+        if name in chunk.columns:
+            return name
+    return None
+
+
+class BatchAggregate:
+    """
+    Running totals of every stat field, so squad-level metrics need no second pass.
+
+    The per-hour metrics divide by mission time, which not every row may have,
+    so they come from separate totals over the rows with a time only.
+    """
+
+    def __init__(self):
+        self.players = 0
+        self.totals = {field: 0 for field in COUNT_FIELDS}
+        self.timed_players = 0
+        self.timed_totals = {field: 0 for field in FIELDS}
+
+    def add(self, columns: Dict[str, np.ndarray]) -> None:
+        self.players += len(next(iter(columns.values())))
+        for field in COUNT_FIELDS:
+            self.totals[field] += int(columns[field].sum())
+        if TIME_FIELD not in columns:
+            return
+        timed = columns[TIME_FIELD] > 0
+        self.timed_players += int(timed.sum())
+        for field in FIELDS:
+            self.timed_totals[field] += int(columns[field][timed].sum())
+
+    def result(self) -> dict:
+        metrics = compute_metrics({field: [total] for field, total in self.totals.items()})
+        totals = dict(self.totals)
+        if self.timed_players:
+            timed = compute_metrics({field: [total] for field, total in self.timed_totals.items()})
+            metrics.update((name, values) for name, values in timed.items() if name not in metrics)
+            totals[TIME_FIELD] = self.timed_totals[TIME_FIELD]
+        return {
+            'players': self.players,
+            'timed_players': self.timed_players,
+            'totals': totals,
+            'metrics': {name: values[0].item() for name, values in metrics.items()},
+        }
+
+
+def analyze_chunk(chunk: 'pd.DataFrame', first_row: int) -> Tuple['pd.DataFrame', Dict[str, np.ndarray]]:
+    """per-row metrics table for one parsed chunk, plus its stat columns for aggregation"""
+    import pandas as pd
+
+    # one copy into a STATS_DTYPE array; the columns are views of it
+    columns = array_columns(from_columns(chunk), with_time=has_time_column(chunk))
+    metrics = pd.DataFrame(compute_metrics(columns))
+    metrics.insert(0, 'row', np.arange(first_row, first_row + len(chunk)))
+    player = player_column(chunk)
+    if player is not None:
+        metrics.insert(1, 'player', chunk[player].astype(str).to_numpy())
+    return metrics, columns
+
+
+def stream_batch(chunks: Iterator['pd.DataFrame'], fmt: str = 'ndjson') -> Iterator[str]:
+    """
+    Yield the analysis of every chunk as soon as it is parsed.
+
+    ndjson: one object per player, then {"aggregate": {...}}
+    csv:    one line per player, then a final line whose row column is "total"
+    """
+    aggregate = BatchAggregate()
+    first_row = 0
+    header = True
+    output_columns = None
+    try:
+        for chunk in chunks:
+            metrics, columns = analyze_chunk(chunk, first_row)
+            aggregate.add(columns)
+            first_row += len(chunk)
+            output_columns = metrics.columns
+            if fmt == 'csv':
+                yield metrics.to_csv(index=False, header=header)
+                header = False
+            elif len(metrics):
+                yield metrics.to_json(orient='records', lines=True, double_precision=15)
+    except (KeyError, ValueError) as e:
+        # the status line is already sent, so report the failure in-band
+        message = e.args[0] if e.args else str(e)
+        if fmt == 'csv':
+            yield f"# error: {message}\n"
+        else:
+            yield json.dumps({'error': message, 'rows_processed': first_row}) + '\n'
+        return
+
+    summary = aggregate.result()
+    if fmt == 'csv':
+        import pandas as pd
+
+        row = pd.DataFrame([dict(summary['metrics'], row='total')])
+        if output_columns is not None:
+            row = row.reindex(columns=output_columns)  # blank player cell, same column order
+        yield row.to_csv(index=False, header=header)
+    else:
+        yield json.dumps({'aggregate': summary}) + '\n'
@@ -0,0 +1,78 @@
+"""
+Benchmark: how building the comparison tables and charts scales with players.
+
+Times the vectorized melt against the row-by-row dict appends of
+Original-Files/compare_players.py, and the full chart build per player count.
+
+    python benchmarks/bench_compare.py --players 2 8 32 128
+"""
+import argparse
+import json
+import sys
+import time
+
+import pandas as pd
+
+from fixtures import random_stat_blocks
+
+from analysis import CombatStatsAnalysis
+from charts import fig_to_png
+from compare import build_comparison, comparison_frame, comparison_tables
+
+
+def append_loop_tables(blocks, names) -> pd.DataFrame:
+    """the old approach: one CombatStatsAnalysis and one dict per player and metric"""
+    rows = []
+    for name, stats in zip(names, blocks):
+        analysis = CombatStatsAnalysis(stats)
+        for metric, value in analysis.efficiency_metrics.items():
+            rows.append({'Metric': metric, 'Player': name, 'Value': value})
+        for style, kills in analysis.combat_style.items():
+            rows.append({'Style': style, 'Player': name, 'Kills': kills})
+    return pd.DataFrame(rows)
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, nargs='+', default=[2, 8, 32, 128])
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    results = []
+    for count in args.players:
+        blocks = random_stat_blocks(count)
+        data = pd.DataFrame(blocks)
+        names = [f"Player {i + 1}" for i in range(count)]
+
+        melt_s = best_of(lambda: comparison_tables(comparison_frame(data)))
+        loop_s = best_of(lambda: append_loop_tables(blocks, names))
+        charts_s = best_of(lambda: [fig_to_png(fig) for fig in build_comparison(comparison_frame(data))], repeat=1)
+        results.append({
+            'players': count,
+            'melt_ms': melt_s * 1000,
+            'append_loop_ms': loop_s * 1000,
+            'charts_s': charts_s,
+            'charts_ms_per_player': charts_s * 1000 / count,
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'players':>8}{'melt ms':>10}{'loop ms':>10}{'charts s':>10}{'ms/player':>11}")
+        for row in results:
+            print(f"{row['players']:>8}{row['melt_ms']:>10.1f}{row['append_loop_ms']:>10.1f}"
+                  f"{row['charts_s']:>10.2f}{row['charts_ms_per_player']:>11.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
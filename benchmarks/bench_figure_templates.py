@@ -0,0 +1,84 @@
+"""
+Benchmark: fresh seaborn figures vs fresh plain-matplotlib figures vs pooled
+figure templates (the seaborn, matplotlib and template render backends).
+
+Renders the same stat blocks through every path, per figure, and reports the
+mean time per render and whether the PNG output is byte-identical to seaborn's.
+
+    python benchmarks/bench_figure_templates.py --blocks 20 --repeat 3
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from fixtures import FIXTURES, random_stat_blocks
+
+import charts
+import mpl_charts
+from analysis import CombatStatsAnalysis
+from figure_templates import FigureTemplatePool
+
+
+def time_renders(render, blocks, repeat):
+    """mean seconds per render of every (figure, block) pair, plus the outputs of the last pass"""
+    timings = {name: [] for name in charts.FIGURES}
+    outputs = {}
+    for _ in range(repeat):
+        for i, (stats, analysis) in enumerate(blocks):
+            for name in charts.FIGURES:
+                start = time.perf_counter()
+                outputs[name, i] = render(name, stats, analysis)
+                timings[name].append(time.perf_counter() - start)
+    return {name: statistics.mean(values) for name, values in timings.items()}, outputs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=20, help='random stat blocks on top of the fixtures')
+    parser.add_argument('--repeat', type=int, default=3, help='passes over all blocks')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    stat_blocks = list(FIXTURES.values()) + random_stat_blocks(args.blocks)
+    blocks = [(stats, CombatStatsAnalysis(stats)) for stats in stat_blocks]
+
+    pool = FigureTemplatePool(size=1)
+    # warm every path so import, font cache and template construction are not timed
+    for name in charts.FIGURES:
+        charts.render_figure(name, *blocks[0])
+        mpl_charts.render_figure(name, *blocks[0])
+        pool.render(name, *blocks[0])
+
+    fresh, fresh_out = time_renders(charts.render_figure, blocks, args.repeat)
+    plain, plain_out = time_renders(mpl_charts.render_figure, blocks, args.repeat)
+    pooled, pooled_out = time_renders(pool.render, blocks, args.repeat)
+    plain_identical = sum(fresh_out[k] == plain_out[k] for k in fresh_out)
+    identical = sum(fresh_out[k] == pooled_out[k] for k in fresh_out)
+
+    results = {
+        'renders_per_path': len(blocks) * args.repeat * len(charts.FIGURES),
+        'identical_outputs': {'matplotlib': f"{plain_identical}/{len(fresh_out)}",
+                              'template': f"{identical}/{len(fresh_out)}"},
+        'figures': {
+            name: {'fresh_ms': fresh[name] * 1000, 'matplotlib_ms': plain[name] * 1000,
+                   'template_ms': pooled[name] * 1000,
+                   'matplotlib_speedup': fresh[name] / plain[name], 'speedup': fresh[name] / pooled[name]}
+            for name in charts.FIGURES
+        },
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'figure':<22}{'fresh ms':>10}{'matplotlib ms':>15}{'template ms':>13}{'mpl x':>8}{'tmpl x':>8}")
+        for name, row in results['figures'].items():
+            print(f"{name:<22}{row['fresh_ms']:>10.1f}{row['matplotlib_ms']:>15.1f}{row['template_ms']:>13.1f}"
+                  f"{row['matplotlib_speedup']:>7.2f}x{row['speedup']:>7.2f}x")
+        print(f"byte-identical to seaborn: matplotlib {results['identical_outputs']['matplotlib']}, "
+              f"template {results['identical_outputs']['template']}")
+    return 0 if identical == plain_identical == len(fresh_out) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Benchmark: bytes per chart and encode time of every image output option.
+
+Builds each figure once per stat block (plain matplotlib builders, same
+output as the seaborn ones) and writes it out with every option, reporting
+the mean size per chart and per results page, the encode time and, for raster
+formats at the reference dpi, how far the pixels are from the full color PNG
+(PSNR in dB, inf = identical; above ~40 dB the difference is not visible).
+
+    python benchmarks/bench_image_formats.py --blocks 5
+    python benchmarks/bench_image_formats.py --options png png8 webp:9 png8@72
+"""
+import argparse
+import io
+import json
+import math
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+from PIL import Image
+
+from fixtures import FIXTURES, random_stat_blocks
+
+import mpl_charts
+from analysis import CombatStatsAnalysis
+from image_formats import ImageOptions
+from mpl_utils import fig_to_image
+
+# format[:compression][@dpi][/colors]
+DEFAULT_OPTIONS = ['png', 'png:9', 'png8', 'png8/64', 'webp', 'webp:9', 'svg', 'png@72', 'png8@72', 'webp@72']
+
+
+def parse_option(spec: str) -> ImageOptions:
+    """'png8:9@72/64' -> ImageOptions(format='png8', compression=9, dpi=72, colors=64)"""
+    fields = {}
+    rest, _, colors = spec.partition('/')
+    rest, _, dpi = rest.partition('@')
+    image_format, _, compression = rest.partition(':')
+    if compression:
+        fields['compression'] = int(compression)
+    if dpi:
+        fields['dpi'] = int(dpi)
+    if colors:
+        fields['colors'] = int(colors)
+    return ImageOptions(format=image_format, **fields)
+
+
+def psnr(reference: bytes, encoded: bytes) -> float:
+    """peak signal to noise ratio of a decoded raster image against the reference png"""
+    with Image.open(io.BytesIO(reference)) as ref, Image.open(io.BytesIO(encoded)) as img:
+        a = np.asarray(ref.convert('RGB'), dtype=np.float64)
+        b = np.asarray(img.convert('RGB'), dtype=np.float64)
+    if a.shape != b.shape:
+        return float('nan')
+    mse = ((a - b) ** 2).mean()
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+def measure(blocks: List[dict], options: Dict[str, ImageOptions]) -> Dict[str, dict]:
+    sizes = {spec: [] for spec in options}
+    timings = {spec: [] for spec in options}
+    quality = {spec: [] for spec in options}
+    reference_options = ImageOptions()
+    for stats in blocks:
+        analysis = CombatStatsAnalysis(stats)
+        for build in mpl_charts.FIGURES.values():
+            fig = build(stats, analysis)
+            reference = fig_to_image(fig, reference_options)
+            for spec, opts in options.items():
+                start = time.perf_counter()
+                data = fig_to_image(fig, opts)
+                timings[spec].append(time.perf_counter() - start)
+                sizes[spec].append(len(data))
+                if opts.format != 'svg' and opts.dpi == reference_options.dpi:
+                    quality[spec].append(psnr(reference, data))
+
+    baseline = statistics.mean(sizes['png']) if 'png' in sizes else None
+    charts_per_page = len(mpl_charts.FIGURES)
+    return {
+        spec: {
+            'format': options[spec].format,
+            'mimetype': options[spec].mimetype,
+            'kb_per_chart': statistics.mean(sizes[spec]) / 1024,
+            'kb_per_page': statistics.mean(sizes[spec]) * charts_per_page / 1024,
+            'vs_png': statistics.mean(sizes[spec]) / baseline if baseline else None,
+            'encode_ms': statistics.mean(timings[spec]) * 1000,
+            'min_psnr_db': min(quality[spec]) if quality[spec] else None,
+        }
+        for spec in options
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=5, help='random stat blocks on top of the fixtures')
+    parser.add_argument('--options', nargs='+', default=DEFAULT_OPTIONS,
+                        help='format[:compression][@dpi][/colors] to compare')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    options = {spec: parse_option(spec) for spec in args.options}
+    blocks = list(FIXTURES.values()) + random_stat_blocks(args.blocks)
+    # warm imports and the font cache so the first option is not charged for them
+    fig_to_image(mpl_charts.FIGURES['rewards'](blocks[0], CombatStatsAnalysis(blocks[0])))
+
+    results = measure(blocks, options)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'option':<12}{'KiB/chart':>10}{'KiB/page':>10}{'vs png':>8}{'encode ms':>11}{'min PSNR':>10}")
+        for spec, row in results.items():
+            ratio = f"{row['vs_png']:.2f}" if row['vs_png'] is not None else '-'
+            quality = f"{row['min_psnr_db']:.1f}" if row['min_psnr_db'] is not None else '-'
+            print(f"{spec:<12}{row['kb_per_chart']:>10.1f}{row['kb_per_page']:>10.1f}{ratio:>8}"
+                  f"{row['encode_ms']:>11.1f}{quality:>10}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
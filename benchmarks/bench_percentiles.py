@@ -0,0 +1,82 @@
+"""
+Benchmark: percentile index build, rank queries and incremental ingest.
+
+Compares the index against a linear scan of the population per query and
+against re-sorting the whole population when new rows arrive.
+
+    python benchmarks/bench_percentiles.py --players 1000000 --ingest 10000
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from fixtures import random_stat_blocks
+
+from analysis import STAT_FIELDS, compute_metrics
+from percentiles import RANKED_METRICS, PercentileIndex
+
+
+def stat_arrays(count: int, seed: int) -> dict:
+    """columns of `count` random players, tiled from a smaller random sample"""
+    sample = random_stat_blocks(min(count, 20_000), seed=seed)
+    rows = np.resize(np.arange(len(sample)), count)
+    return {field: np.array([block[field] for block in sample], dtype=np.int64)[rows] for field in STAT_FIELDS}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=1_000_000)
+    parser.add_argument('--ingest', type=int, default=10_000, help='rows per incremental ingest')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    population = stat_arrays(args.players, seed=1)
+    start = time.perf_counter()
+    index = PercentileIndex()
+    index.add(population)
+    build_s = time.perf_counter() - start
+
+    probes = compute_metrics(stat_arrays(args.queries, seed=2))
+    start = time.perf_counter()
+    for i in range(args.queries):
+        index.percentiles({label: probes[column][i] for label, column in RANKED_METRICS.items() if column in probes})
+    query_us = (time.perf_counter() - start) / args.queries * 1e6
+
+    # the scan is slow, so time it on a handful of probes
+    values = compute_metrics(population)['kills_per_mission']
+    scans = min(args.queries, 20)
+    start = time.perf_counter()
+    for i in range(scans):
+        (values < probes['kills_per_mission'][i]).mean()
+    scan_us = (time.perf_counter() - start) / scans * 1e6 * len([c for c in RANKED_METRICS.values() if c in probes])
+
+    batch = stat_arrays(args.ingest, seed=3)
+    start = time.perf_counter()
+    index.add(batch)
+    ingest_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    np.sort(np.concatenate([values, compute_metrics(batch)['kills_per_mission']]))
+    resort_ms = (time.perf_counter() - start) * 1000 * len(RANKED_METRICS)
+
+    results = {
+        'players': len(index),
+        'build_seconds': build_s,
+        'rank_all_metrics_us': query_us,
+        'linear_scan_all_metrics_us': scan_us,
+        'incremental_ingest_ms': ingest_ms,
+        'full_resort_ms': resort_ms,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, value in results.items():
+            print(f"{name:<28}{value:>14,.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
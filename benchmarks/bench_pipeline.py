@@ -0,0 +1,181 @@
+"""
+Benchmark: every stage of the /analyze pipeline, timed separately.
+
+Runs offline through Flask's test client on the fixture stat blocks (the
+26Feb2025.csv row, a zero-mission account, a no-kills account) and times:
+
+    parse_form          normalize_stats(request.form)
+    analysis            CombatStatsAnalysis construction
+    build:<figure>      each builder in charts.FIGURES
+    encode:<figure>     fig_to_base64 of that figure
+    render_template     results.html with the encoded charts
+    request             a whole POST /analyze, render cache off
+
+Peak memory per stage comes from a separate tracemalloc pass, so tracing
+does not slow the timed runs. Results can be saved as JSON and compared
+with a run from another commit:
+
+    python benchmarks/bench_pipeline.py --repeat 5 --output before.json
+    python benchmarks/bench_pipeline.py --repeat 5 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+# every request must render, and render in this process
+os.environ['RENDER_CACHE_BYTES'] = '0'
+os.environ['FIGURE_CACHE_BYTES'] = '0'
+os.environ['RENDER_WORKERS'] = '0'
+
+from fixtures import FIXTURES, REPO_ROOT
+
+import app as webapp
+import charts
+from analysis import CombatStatsAnalysis
+from flask import render_template, request
+
+
+def form_data(stats: dict) -> Dict[str, str]:
+    """stats as a browser posts them"""
+    return {field: str(value) for field, value in stats.items()}
+
+
+def run_stages(client, form: Dict[str, str], measure: Callable[[str, Callable], object]) -> None:
+    """run the pipeline once, passing every stage through measure(stage_name, fn)"""
+    with webapp.app.test_request_context('/analyze', method='POST', data=form):
+        stats = measure('parse_form', lambda: webapp.normalize_stats(request.form))
+        analysis = measure('analysis', lambda: CombatStatsAnalysis(stats))
+        images = []
+        for name, build in charts.FIGURES.items():
+            fig = measure(f'build:{name}', lambda: build(stats, analysis))
+            images.append(measure(f'encode:{name}', lambda: charts.fig_to_base64(fig)))
+        summary = webapp.build_summary_stats(analysis)
+        measure('render_template', lambda: render_template('results.html', images=images, stats=summary,
+                                                           percentiles={}))
+    measure('request', lambda: client.post('/analyze', data=form))
+
+
+def time_fixture(client, form: Dict[str, str], repeat: int) -> Dict[str, List[float]]:
+    timings: Dict[str, List[float]] = {}
+
+    def measure(stage, fn):
+        start = time.perf_counter()
+        result = fn()
+        timings.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    for _ in range(repeat):
+        run_stages(client, form, measure)
+    return timings
+
+
+def peak_memory(client, form: Dict[str, str]) -> Dict[str, int]:
+    """bytes allocated at the peak of each stage, above what was live when it started"""
+    peaks = {}
+
+    def measure(stage, fn):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = fn()
+        peaks[stage] = tracemalloc.get_traced_memory()[1] - before
+        return result
+
+    tracemalloc.start()
+    try:
+        run_stages(client, form, measure)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def environment() -> dict:
+    import flask, matplotlib, numpy, pandas, seaborn
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'render_backend': webapp.render_engine.backend,
+        'versions': {module.__name__: module.__version__
+                     for module in (flask, matplotlib, numpy, pandas, seaborn)},
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """print median time ratios against a baseline run; False if any stage slowed past threshold"""
+    ok = True
+    print(f"\nvs {baseline['environment'].get('commit')}: median ratio (>{threshold:.2f} flagged)")
+    for fixture, stages in results['fixtures'].items():
+        for stage, row in stages.items():
+            old = baseline['fixtures'].get(fixture, {}).get(stage)
+            if not old:
+                continue
+            ratio = row['median_ms'] / old['median_ms']
+            flag = '  <-- slower' if ratio > threshold else ''
+            ok = ok and not flag
+            print(f"{fixture:<15}{stage:<30}{old['median_ms']:>9.2f}{row['median_ms']:>9.2f}{ratio:>7.2f}x{flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per fixture')
+    parser.add_argument('--fixtures', nargs='+', choices=list(FIXTURES), default=list(FIXTURES))
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio that fails --compare')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    client = webapp.app.test_client()
+    # warm imports, font cache and jinja's template cache so they are not timed
+    run_stages(client, form_data(FIXTURES['csv_row']), lambda stage, fn: fn())
+
+    results = {'environment': environment(), 'repeat': args.repeat, 'fixtures': {}}
+    for fixture in args.fixtures:
+        form = form_data(FIXTURES[fixture])
+        timings = time_fixture(client, form, args.repeat)
+        peaks = peak_memory(client, form)
+        results['fixtures'][fixture] = {
+            stage: {
+                'min_ms': min(values) * 1000,
+                'median_ms': statistics.median(values) * 1000,
+                'mean_ms': statistics.mean(values) * 1000,
+                'peak_kb': peaks[stage] / 1024,
+            }
+            for stage, values in timings.items()
+        }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'fixture':<15}{'stage':<30}{'median ms':>10}{'min ms':>9}{'peak KiB':>10}")
+        for fixture, stages in results['fixtures'].items():
+            for stage, row in stages.items():
+                print(f"{fixture:<15}{stage:<30}{row['median_ms']:>10.2f}{row['min_ms']:>9.2f}{row['peak_kb']:>10.0f}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
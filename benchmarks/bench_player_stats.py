@@ -0,0 +1,98 @@
+"""
+Benchmark: memory per player and parse time of the player stat shapes.
+
+Builds N export-style rows (Title Case headers, as in 26Feb2025.csv) from the
+random fixture blocks and parses them three ways:
+
+    dict            {field: int(row.get(field, row.get(header, 0)))} per field,
+                    the per-key lookups the form parser used to do
+    PlayerStats     PlayerStats.from_mapping(row), one lookup per key present
+    structured      player_stats.from_columns on the rows as a DataFrame,
+                    one STATS_DTYPE array for all of them
+
+and reports the bytes held per player (tracemalloc) and the rows parsed per
+second of each.
+
+    python benchmarks/bench_player_stats.py --rows 20000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from fixtures import random_stat_blocks
+
+import pandas as pd
+
+from durations import format_duration, parse_duration
+from player_stats import COUNT_FIELDS, CSV_COLUMNS, TIME_CSV_COLUMN, TIME_FIELD, PlayerStats, from_columns
+
+
+def export_rows(count: int) -> List[dict]:
+    """random players keyed by export header, with supply/reinforce and a mission time"""
+    rng = random.Random(2025)
+    rows = []
+    for block in random_stat_blocks(count):
+        row = {CSV_COLUMNS[field]: value for field, value in block.items()}
+        row[CSV_COLUMNS['supply_stratagems']] = rng.randint(0, block['total_stratagems'] // 10)
+        row[CSV_COLUMNS['reinforcements']] = rng.randint(0, block['deaths'])
+        row[TIME_CSV_COLUMN] = format_duration(block['missions_played'] * rng.randint(600, 2400))
+        rows.append(row)
+    return rows
+
+
+def parse_dict(row: dict) -> Dict[str, int]:
+    stats = {field: int(row.get(field, row.get(CSV_COLUMNS[field], 0))) for field in COUNT_FIELDS}
+    stats[TIME_FIELD] = parse_duration(row.get(TIME_FIELD, row.get(TIME_CSV_COLUMN, 0)))
+    return stats
+
+
+def parse_dicts(rows: List[dict]) -> List[Dict[str, int]]:
+    return [parse_dict(row) for row in rows]
+
+
+def parse_records(rows: List[dict]) -> List[PlayerStats]:
+    return [PlayerStats.from_mapping(row) for row in rows]
+
+
+def measure(name: str, parse: Callable, source, rows: int) -> dict:
+    start = time.perf_counter()
+    parse(source)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    held = parse(source)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return {'name': name, 'bytes_per_player': current / rows, 'rows_per_second': rows / elapsed}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000, help='players to parse')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    rows = export_rows(args.rows)
+    frame = pd.DataFrame(rows)
+    results = [
+        measure('dict', parse_dicts, rows, args.rows),
+        measure('PlayerStats', parse_records, rows, args.rows),
+        measure('structured', from_columns, frame, args.rows),
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'shape':<14}{'bytes/player':>14}{'rows/s':>12}")
+        for row in results:
+            print(f"{row['name']:<14}{row['bytes_per_player']:>14.0f}{row['rows_per_second']:>12.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
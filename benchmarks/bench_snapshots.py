@@ -0,0 +1,111 @@
+"""
+Benchmark: snapshot store ingest and indexed queries vs rescanning CSV dumps.
+
+Writes one export per date for a synthetic community, ingests them into a
+temporary SQLite store and times delta / latest-per-player queries against
+the naive approach of re-reading the CSV files.
+
+    python benchmarks/bench_snapshots.py --players 5000 --dates 6 --queries 200
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from fixtures import random_stat_blocks
+
+from analysis import CSV_COLUMNS, STAT_FIELDS
+from snapshots import SnapshotStore
+
+
+def write_exports(directory: str, players: int, dates: int) -> list:
+    """one CSV per snapshot date; counters only grow between snapshots"""
+    frame = pd.DataFrame(random_stat_blocks(players))
+    names = [f"diver-{i:06d}" for i in range(players)]
+    day = datetime.date(2025, 2, 26)
+    paths = []
+    for _ in range(dates):
+        export = frame.rename(columns=CSV_COLUMNS)
+        export.insert(0, 'Player', names)
+        export['In Mission Time'] = [f"{m // 2}:{m % 60:02d}:00" for m in frame['missions_played']]
+        path = os.path.join(directory, day.strftime('%d%b%Y') + '.csv')
+        export.to_csv(path, index=False)
+        paths.append((path, day))
+        frame = frame + frame // 10
+        day += datetime.timedelta(days=30)
+    return paths
+
+
+def time_it(fn, repeat: int) -> float:
+    """mean milliseconds per call"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.mean(timings) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=5000)
+    parser.add_argument('--dates', type=int, default=6)
+    parser.add_argument('--queries', type=int, default=200, help='delta queries to time')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as directory:
+        exports = write_exports(directory, args.players, args.dates)
+        store = SnapshotStore(os.path.join(directory, 'snapshots.db'))
+
+        start = time.perf_counter()
+        rows = sum(store.ingest_csv(path, day) for path, day in exports)
+        ingest_s = time.perf_counter() - start
+
+        players = [f"diver-{rng.randrange(args.players):06d}" for _ in range(args.queries)]
+        first, last = exports[0][1].isoformat(), exports[-1][1].isoformat()
+        queries = iter(players * 2)
+        delta_ms = time_it(lambda: store.delta(next(queries), first, last), args.queries)
+        latest_ms = time_it(store.latest, 3)
+
+        def rescan_delta():
+            player = rng.choice(players)
+            a = pd.read_csv(exports[0][0]).set_index('Player').loc[player]
+            b = pd.read_csv(exports[-1][0]).set_index('Player').loc[player]
+            return {field: b[CSV_COLUMNS[field]] - a[CSV_COLUMNS[field]] for field in STAT_FIELDS}
+
+        def rescan_latest():
+            frames = [pd.read_csv(path).assign(date=day) for path, day in exports]
+            return pd.concat(frames).sort_values('date').groupby('Player').tail(1)
+
+        rescan_delta_ms = time_it(rescan_delta, 5)
+        rescan_latest_ms = time_it(rescan_latest, 1)
+
+    results = {
+        'players': args.players,
+        'snapshots': rows,
+        'ingest_seconds': ingest_s,
+        'ingest_rows_per_second': rows / ingest_s,
+        'delta_query_ms': delta_ms,
+        'delta_rescan_csv_ms': rescan_delta_ms,
+        'latest_per_player_ms': latest_ms,
+        'latest_rescan_csv_ms': rescan_latest_ms,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, value in results.items():
+            print(f"{name:<26}{value:>14,.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
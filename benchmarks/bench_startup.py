@@ -0,0 +1,104 @@
+"""
+Benchmark: cold start of the app, each measurement in a fresh interpreter.
+
+    import              `import app`, from python -X importtime
+    first_index         import + the first GET /
+    first_analyze_cold  import + the first POST /analyze, nothing warmed
+    warmup              the background warm-up steps, run inline
+    first_analyze_warm  the first POST /analyze after the warm-up
+
+Fails (exit 1) when `import app` exceeds the import-time budget or pulls in
+pandas, matplotlib or seaborn, which must only load on first use.
+
+    python benchmarks/bench_startup.py --budget-ms 500 --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from fixtures import CSV_ROW_STATS, REPO_ROOT
+
+HEAVY_MODULES = ('pandas', 'matplotlib', 'seaborn')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+result = {'heavy_loaded': [m for m in %(heavy)r if m in sys.modules]}
+client = app.app.test_client()
+if %(mode)r == 'index':
+    client.get('/')
+elif %(mode)r == 'warm':
+    app.warmup.run(app.warmup_steps())
+    result['warmup'] = time.perf_counter() - imported
+    imported = time.perf_counter()
+    client.post('/analyze', data=%(form)r)
+else:
+    client.post('/analyze', data=%(form)r)
+result['import'] = imported - start
+result['first_response'] = time.perf_counter() - imported
+print(json.dumps(result))
+"""
+
+
+def probe(mode: str) -> dict:
+    """run one fresh interpreter and return what it measured"""
+    code = PROBE % {'heavy': HEAVY_MODULES, 'mode': mode,
+                    'form': {field: str(value) for field, value in CSV_ROW_STATS.items()}}
+    env = dict(os.environ, RENDER_CACHE_BYTES='0', FIGURE_CACHE_BYTES='0', RENDER_WORKERS='0')
+    out = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def import_time_us() -> int:
+    """cumulative microseconds of `import app` as reported by -X importtime"""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=REPO_ROOT,
+                         capture_output=True, text=True, check=True).stderr
+    for line in err.splitlines():
+        if line.rstrip().endswith('| app'):
+            return int(line.split('|')[1])
+    raise RuntimeError("no importtime line for app")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per measurement (median)')
+    parser.add_argument('--budget-ms', type=float, default=500.0, help='import-time budget of `import app`')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    imports = [import_time_us() / 1000 for _ in range(args.runs)]
+    index = [probe('index') for _ in range(args.runs)]
+    cold = [probe('cold') for _ in range(args.runs)]
+    warm = [probe('warm') for _ in range(args.runs)]
+
+    def median_ms(runs, key):
+        return statistics.median(run[key] for run in runs) * 1000
+
+    results = {
+        'budget_ms': args.budget_ms,
+        'import_ms': statistics.median(imports),
+        'heavy_modules_after_import': index[0]['heavy_loaded'],
+        'first_index_ms': median_ms(index, 'import') + median_ms(index, 'first_response'),
+        'first_analyze_cold_ms': median_ms(cold, 'first_response'),
+        'warmup_ms': median_ms(warm, 'warmup'),
+        'first_analyze_warm_ms': median_ms(warm, 'first_response'),
+    }
+    ok = results['import_ms'] <= args.budget_ms and not results['heavy_modules_after_import']
+    results['within_budget'] = ok
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, value in results.items():
+            print(f"{name:<28}{value:>12.1f}" if isinstance(value, float) else f"{name:<28}{value!s:>12}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
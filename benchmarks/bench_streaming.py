@@ -0,0 +1,102 @@
+"""
+Benchmark: time to first byte, first chart and last byte of /analyze, streamed or not.
+
+Serves the app with waitress on a local port in this process (caches off, so
+every request renders) and posts each stat block once with stream=0 and once
+with stream=1, reading the response as it arrives. Also reports the peak
+Python memory allocated while each response is produced (tracemalloc), which
+for the whole page includes the complete HTML string.
+
+    python benchmarks/bench_streaming.py --blocks 3
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List
+from urllib.parse import urlencode
+
+os.environ['RENDER_CACHE_BYTES'] = '0'
+os.environ['FIGURE_CACHE_BYTES'] = '0'
+os.environ['WARMUP'] = '0'
+
+from fixtures import FIXTURES, random_stat_blocks
+
+from waitress.server import create_server
+
+import app as webapp
+
+
+def timed_post(port: int, stats: dict, stream: bool) -> Dict[str, float]:
+    """seconds until the first body byte, the first chart and the end of the response"""
+    body = urlencode(dict(stats, stream='1' if stream else '0'))
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    start = time.perf_counter()
+    conn.request('POST', '/analyze', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    first_byte = first_chart = None
+    seen = b''
+    while True:
+        data = response.read1(65536)
+        if not data:
+            break
+        now = time.perf_counter() - start
+        if first_byte is None:
+            first_byte = now
+        seen = seen[-16:] + data
+        if first_chart is None and b';base64,' in seen:
+            first_chart = now
+    total = time.perf_counter() - start
+    conn.close()
+    assert response.status == 200, response.status
+    return {'first_byte': first_byte, 'first_chart': first_chart, 'total': total}
+
+
+def measure(port: int, blocks: List[dict], stream: bool) -> dict:
+    runs = [timed_post(port, stats, stream) for stats in blocks]
+    # separate pass, tracing every allocation slows the render down several times
+    peaks = []
+    for stats in blocks:
+        tracemalloc.start()
+        timed_post(port, stats, stream)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {
+        **{f"{name}_ms": statistics.median(run[name] for run in runs) * 1000 for name in runs[0]},
+        'peak_kib': statistics.median(peaks) / 1024,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=3, help='random stat blocks on top of the csv_row fixture')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    server = create_server(webapp.app, host='127.0.0.1', port=0, threads=2)
+    threading.Thread(target=server.run, daemon=True).start()
+    port = server.effective_port
+
+    # warm imports and the font cache so the first mode is not charged for them
+    timed_post(port, FIXTURES['no_kills'], stream=False)
+    blocks = [FIXTURES['csv_row']] + random_stat_blocks(args.blocks)
+    results = {'whole': measure(port, blocks, stream=False), 'streamed': measure(port, blocks, stream=True)}
+    server.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'page':<10}{'first byte ms':>15}{'first chart ms':>16}{'total ms':>10}{'peak KiB':>10}")
+        for name, row in results.items():
+            print(f"{name:<10}{row['first_byte_ms']:>15.0f}{row['first_chart_ms']:>16.0f}"
+                  f"{row['total_ms']:>10.0f}{row['peak_kib']:>10.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Check the per-hour metrics of /analyze/batch when only some rows have a mission time.
+
+Builds a career stats CSV from random stat blocks where some rows carry an
+In Mission Time and the rest leave the cell blank, runs it through
+batch.stream_batch and checks that:
+
+    - timed rows get the per-hour rates of their own kills, XP and samples
+    - untimed rows get 0 hours and 0 per-hour rates
+    - the squad's per-hour rates are the timed rows' totals over their time,
+      not every row's kills over some rows' time
+
+Exits non-zero on any mismatch.
+
+    python benchmarks/check_batch_time.py --rows 12
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import sys
+from typing import List
+
+from fixtures import random_stat_blocks
+
+from batch import read_stat_chunks, stream_batch
+from durations import format_duration
+from player_stats import CSV_COLUMNS, STAT_FIELDS, TIME_CSV_COLUMN
+
+KILL_FIELDS = ('terminid_kills', 'automaton_kills', 'illuminate_kills')
+
+
+def build_csv(blocks: List[dict], seconds: List[int]) -> str:
+    """export-style CSV of the blocks, with a blank time cell where seconds is 0"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow([CSV_COLUMNS[field] for field in STAT_FIELDS] + [TIME_CSV_COLUMN])
+    for stats, secs in zip(blocks, seconds):
+        writer.writerow([stats[field] for field in STAT_FIELDS] + [format_duration(secs) if secs else ''])
+    return out.getvalue()
+
+
+def close(a: float, b: float) -> bool:
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=12, help='rows in the CSV, every third one timed')
+    args = parser.parse_args()
+
+    blocks = random_stat_blocks(args.rows)
+    seconds = [(i + 1) * 3600 * 7 + 1234 if i % 3 == 0 else 0 for i in range(args.rows)]
+    lines = [json.loads(line) for line in
+             ''.join(stream_batch(read_stat_chunks(io.StringIO(build_csv(blocks, seconds))))).splitlines()]
+    rows, aggregate = lines[:-1], lines[-1]['aggregate']
+
+    failures = []
+    for row, stats, secs in zip(rows, blocks, seconds):
+        hours = secs / 3600
+        kills = sum(stats[field] for field in KILL_FIELDS)
+        expected = kills / hours if hours else 0.0
+        if not close(row['mission_hours'], hours) or not close(row['kills_per_hour'], expected):
+            failures.append(f"row {row['row']}: {row['mission_hours']} h, {row['kills_per_hour']} kills/h, "
+                            f"expected {hours} h, {expected} kills/h")
+
+    timed = [(stats, secs) for stats, secs in zip(blocks, seconds) if secs]
+    hours = sum(secs for _, secs in timed) / 3600
+    expected = {
+        'mission_hours': hours,
+        'kills_per_hour': sum(stats[field] for stats, _ in timed for field in KILL_FIELDS) / hours,
+        'xp_per_hour': sum(stats['total_xp'] for stats, _ in timed) / hours,
+        'samples_per_hour': sum(stats['samples_collected'] for stats, _ in timed) / hours,
+    }
+    for name, value in expected.items():
+        if not close(aggregate['metrics'][name], value):
+            failures.append(f"aggregate {name}: {aggregate['metrics'][name]}, expected {value}")
+    if aggregate.get('timed_players') != len(timed):
+        failures.append(f"aggregate timed_players: {aggregate.get('timed_players')}, expected {len(timed)}")
+
+    print(f"{len(rows)} rows, {len(timed)} timed: squad {aggregate['metrics']['kills_per_hour']:.2f} kills/h "
+          f"over {aggregate['metrics']['mission_hours']:.1f} h")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: per-hour metrics only use rows with a mission time")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Check that identical concurrent /analyze requests share one render.
+
+Fires K requests with the same stat block from K threads at once (released
+together by a barrier) through Flask's test client, with the render caches off
+so only single-flight coalescing can deduplicate them, and counts the calls
+into the render engine. The identical burst runs twice, as whole pages and
+streamed (stream=1), then K different stat blocks run as a control. Exits
+non-zero unless each identical burst rendered exactly once, the control
+rendered K times, and every identical response is byte-identical.
+
+    python benchmarks/check_coalescing.py --requests 16
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+# no cache: a second identical request must not be able to reuse a finished render
+os.environ['RENDER_CACHE_BYTES'] = '0'
+os.environ['FIGURE_CACHE_BYTES'] = '0'
+os.environ['RENDER_WORKERS'] = '0'
+
+from fixtures import FIXTURES, random_stat_blocks
+
+import app as webapp
+import metrics
+
+renders = 0
+renders_lock = threading.Lock()
+engine_render_iter = webapp.render_engine.render_iter
+
+
+def counting_render_iter(*args, **kwargs):
+    # every render, whole page or streamed, goes through render_iter
+    global renders
+    with renders_lock:
+        renders += 1
+    return engine_render_iter(*args, **kwargs)
+
+
+webapp.render_engine.render_iter = counting_render_iter
+
+
+def burst(payloads: List[dict]) -> List[str]:
+    """post every payload from its own thread, all released at the same moment"""
+    barrier = threading.Barrier(len(payloads))
+
+    def post(stats: dict) -> str:
+        client = webapp.app.test_client()
+        barrier.wait()
+        response = client.post('/analyze', data=stats)
+        assert response.status_code == 200, response.status_code
+        return hashlib.sha256(response.data).hexdigest()
+
+    with ThreadPoolExecutor(max_workers=len(payloads)) as pool:
+        return list(pool.map(post, payloads))
+
+
+def run(name: str, payloads: List[dict]) -> dict:
+    global renders
+    renders = 0
+    coalesced_before = metrics.RENDERS_COALESCED.value()
+    start = time.perf_counter()
+    digests = burst(payloads)
+    elapsed = time.perf_counter() - start
+    return {
+        'name': name,
+        'requests': len(payloads),
+        'renders': renders,
+        'coalesced': metrics.RENDERS_COALESCED.value() - coalesced_before,
+        'distinct_responses': len(set(digests)),
+        'seconds': elapsed,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=16, help='simultaneous requests per burst (K)')
+    args = parser.parse_args()
+
+    # warm imports and the font cache so the first burst is not dominated by them
+    webapp.app.test_client().post('/analyze', data=FIXTURES['no_kills'])
+
+    identical = run('identical', [FIXTURES['csv_row']] * args.requests)
+    streamed = run('streamed', [dict(FIXTURES['csv_row'], stream='1')] * args.requests)
+    control = run('distinct', random_stat_blocks(args.requests))
+
+    print(f"{'burst':<12}{'requests':>9}{'renders':>9}{'coalesced':>11}{'responses':>11}{'seconds':>9}")
+    for row in (identical, streamed, control):
+        print(f"{row['name']:<12}{row['requests']:>9}{row['renders']:>9}{row['coalesced']:>11}"
+              f"{row['distinct_responses']:>11}{row['seconds']:>9.2f}")
+
+    ok = (all(row['renders'] == 1 and row['coalesced'] == args.requests - 1 and row['distinct_responses'] == 1
+              for row in (identical, streamed))
+          and control['renders'] == args.requests)
+    print("OK: identical requests shared one render" if ok else "FAIL: identical requests were not coalesced")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
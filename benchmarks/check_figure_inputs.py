@@ -0,0 +1,113 @@
+"""
+Check the figure dependency graph (rendering.FIGURE_INPUTS) and time the
+incremental re-render it allows.
+
+For every stat block and every field, renders each figure with the field
+changed: a figure whose image changes although the field is not one of its
+inputs would be served stale from the per-figure cache, so that fails the
+check. Inputs that never changed a figure are listed as unused (harmless,
+they only cost cache hits).
+
+Then times /analyze resubmissions that tweak one field, with the per-figure
+cache on and off (the whole-result cache off in both).
+
+    python benchmarks/check_figure_inputs.py --blocks 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Set
+
+os.environ['RENDER_CACHE_BYTES'] = '0'
+os.environ['RENDER_WORKERS'] = '0'
+
+from fixtures import FIXTURES, random_stat_blocks
+
+import app as webapp
+import mpl_charts
+from analysis import STAT_FIELDS
+from rendering import FIGURE_INPUTS
+
+
+def tweak(stats: dict, field: str, grow: bool = True) -> dict:
+    """the stats with one field changed enough to show in any chart that uses it"""
+    value = stats[field] * 2 + 7 if grow else stats[field] // 2
+    return dict(stats, **{field: value})
+
+
+def render_tweaked(name: str, stats: dict, field: str) -> bytes:
+    try:
+        return mpl_charts.render_figure(name, tweak(stats, field))
+    except ValueError:
+        # e.g. more missions won than played; shrink the field instead
+        return mpl_charts.render_figure(name, tweak(stats, field, grow=False))
+
+
+def check_inputs(blocks) -> Dict[str, dict]:
+    undeclared: Dict[str, Set[str]] = {name: set() for name in FIGURE_INPUTS}
+    used: Dict[str, Set[str]] = {name: set() for name in FIGURE_INPUTS}
+    for stats in blocks:
+        base = {name: mpl_charts.render_figure(name, stats) for name in FIGURE_INPUTS}
+        for field in STAT_FIELDS:
+            for name in FIGURE_INPUTS:
+                if render_tweaked(name, stats, field) == base[name]:
+                    continue
+                used[name].add(field)
+                if field not in FIGURE_INPUTS[name]:
+                    undeclared[name].add(field)
+    return {
+        name: {'undeclared': sorted(undeclared[name]),
+               'unused': sorted(set(FIGURE_INPUTS[name]) - used[name])}
+        for name in FIGURE_INPUTS
+    }
+
+
+def time_resubmits(stats: dict, figure_cache_bytes: int) -> Dict[str, float]:
+    """seconds per /analyze resubmission changing one field, by field, after the original was submitted"""
+    webapp.figure_cache.max_bytes = figure_cache_bytes
+    webapp.figure_cache.clear()
+    client = webapp.app.test_client()
+    client.post('/analyze', data=stats)
+    timings = {}
+    for field in ('friendly_kills', 'missions_won', 'deaths'):
+        start = time.perf_counter()
+        client.post('/analyze', data=tweak(stats, field, grow=False))
+        timings[field] = time.perf_counter() - start
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=3, help='random stat blocks on top of the csv_row fixture')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    blocks = [FIXTURES['csv_row']] + random_stat_blocks(args.blocks)
+    inputs = check_inputs(blocks)
+    budget = webapp.app.config['FIGURE_CACHE_BYTES'] or 32 * 1024 * 1024
+    cold = time_resubmits(FIXTURES['csv_row'], 0)
+    incremental = time_resubmits(FIXTURES['csv_row'], budget)
+    results = {
+        'inputs': inputs,
+        'resubmit_ms': {field: {'all_figures': cold[field] * 1000, 'changed_figures': incremental[field] * 1000}
+                        for field in cold},
+    }
+
+    ok = not any(row['undeclared'] for row in inputs.values())
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, row in inputs.items():
+            status = 'FAIL, also depends on ' + ', '.join(row['undeclared']) if row['undeclared'] else 'ok'
+            unused = f" (never changed by: {', '.join(row['unused'])})" if row['unused'] else ''
+            print(f"{name:<22}{status}{unused}")
+        print(f"\n{'resubmit changing':<20}{'redraw all ms':>14}{'redraw changed ms':>19}")
+        for field, row in results['resubmit_ms'].items():
+            print(f"{field:<20}{row['all_figures']:>14.0f}{row['changed_figures']:>19.0f}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Check which image format a request gets, configured or asked for with `image_format`.
+
+Runs negotiate_format over the combinations of a requested format, the
+configured IMAGE_FORMAT and the client's Accept header, then posts
+image_format=auto to /analyze and /api/analyze?png=1 with and without
+image/webp in Accept. 'auto' must give webp when the client accepts it and
+png8 otherwise, whether it was requested or configured. Exits non-zero on any
+mismatch.
+
+    python benchmarks/check_image_negotiation.py
+"""
+import base64
+import os
+import re
+import sys
+
+os.environ['WARMUP'] = '0'
+# no render cache: /api/analyze?png=1 then inlines the images instead of linking them
+os.environ['RENDER_CACHE_BYTES'] = '0'
+
+from fixtures import FIXTURES
+
+import app as webapp
+from image_formats import negotiate_format
+
+WEBP = ['image/webp', 'text/html']
+NO_WEBP = ['text/html']
+
+# (requested, accepted, configured) -> format
+CASES = [
+    ((None, WEBP, 'auto'), 'webp'),
+    ((None, NO_WEBP, 'auto'), 'png8'),
+    (('auto', WEBP, 'png'), 'webp'),
+    (('auto', NO_WEBP, 'png'), 'png8'),
+    (('auto', WEBP, 'auto'), 'webp'),
+    (('png', WEBP, 'auto'), 'png'),
+    (('svg', NO_WEBP, 'png8'), 'svg'),
+    ((None, WEBP, 'png'), 'png'),
+]
+
+
+def image_kind(data: bytes) -> str:
+    """webp, png8 (palette png) or png from the file header"""
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png8' if data[25] == 3 else 'png'  # IHDR color type 3: palette
+    return 'other'
+
+
+def posted_kinds(accept: str) -> dict:
+    """image kinds of the charts /analyze and /api/analyze return for image_format=auto"""
+    client = webapp.app.test_client()
+    stats = dict(FIXTURES['csv_row'], image_format='auto')
+    page = client.post('/analyze', data=stats, headers={'Accept': f"{accept},*/*;q=0.8"})
+    api = client.post('/api/analyze?png=1&image_format=auto', json=FIXTURES['csv_row'],
+                      headers={'Accept': f"application/json,{accept}"})
+    page_images = [base64.b64decode(b) for b in re.findall(rb'base64,([A-Za-z0-9+/=]+)', page.data)]
+    api_images = [base64.b64decode(b) for b in (api.get_json() or {}).get('images', [])]
+    return {
+        '/analyze': (page.status_code, sorted({image_kind(img) for img in page_images})),
+        '/api/analyze': (api.status_code, sorted({image_kind(img) for img in api_images})),
+    }
+
+
+def main() -> int:
+    failures = []
+    for args, expected in CASES:
+        got = negotiate_format(*args)
+        if got != expected:
+            failures.append(f"negotiate_format{args}: {got}, expected {expected}")
+
+    for accept, expected in (('image/webp', 'webp'), ('image/png', 'png8')):
+        for path, (status, kinds) in posted_kinds(accept).items():
+            print(f"{path:<14} Accept {accept:<11} -> {status} {', '.join(kinds) or 'no images'}")
+            if status != 200 or kinds != [expected]:
+                failures.append(f"{path} image_format=auto with Accept {accept}: {status} {kinds}, "
+                                f"expected 200 [{expected!r}]")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: 'auto' resolves to webp or png8 from the Accept header, requested or configured")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
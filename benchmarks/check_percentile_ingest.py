@@ -0,0 +1,103 @@
+"""
+Check that the app's percentile index follows snapshot ingests.
+
+Ingests a snapshot of every player into a temporary SNAPSHOT_DB, ranks once
+through the app so the index is built, then ingests newer snapshots for a few
+players per round. After each round the app's index must hold each player
+once and rank like an index rebuilt from the store. Exits non-zero on any
+mismatch.
+
+    python benchmarks/check_percentile_ingest.py --players 300 --rounds 6
+"""
+import argparse
+import csv
+import datetime
+import io
+import os
+import random
+import sys
+import tempfile
+
+os.environ['WARMUP'] = '0'
+
+from fixtures import random_stat_blocks
+
+import app as webapp
+from durations import format_duration
+from percentiles import RANKED_METRICS, PercentileIndex
+from player_stats import CSV_COLUMNS, STAT_FIELDS, TIME_CSV_COLUMN
+from snapshots import SnapshotStore
+
+
+def export(players: dict) -> io.StringIO:
+    """career stats CSV with a player column, one row per player"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['Player'] + [CSV_COLUMNS[field] for field in STAT_FIELDS] + [TIME_CSV_COLUMN])
+    for name, stats in players.items():
+        writer.writerow([name] + [stats[field] for field in STAT_FIELDS]
+                        + [format_duration(stats['missions_played'] * 1500)])
+    out.seek(0)
+    return out
+
+
+def mismatches(index: PercentileIndex, expected: PercentileIndex, probes: list) -> list:
+    failures = []
+    for column in RANKED_METRICS.values():
+        if index.size(column) != expected.size(column):
+            failures.append(f"{column}: {index.size(column)} players, expected {expected.size(column)}")
+        for value in probes:
+            got, want = index.rank(column, value), expected.rank(column, value)
+            if got != want and (got is None or want is None or abs(got - want) > 1e-9):
+                failures.append(f"{column} rank of {value}: {got}, expected {want}")
+                break
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=6)
+    parser.add_argument('--changed', type=int, default=40, help='players with a newer snapshot per round')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    names = [f"diver-{i:04d}" for i in range(args.players)]
+    players = dict(zip(names, random_stat_blocks(args.players)))
+    probes = [0.0, 0.5, 1.0, 2.5, 10.0, 50.0, 250.0, 1e4]
+    day = datetime.date(2025, 2, 26)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'snapshots.sqlite')
+        store = SnapshotStore(path)
+        store.ingest_csv(export(players), day)
+        webapp.app.config.update(SNAPSHOT_DB=path, PERCENTILE_DATA=None)
+        index = webapp.get_percentile_index()
+
+        for round_ in range(1, args.rounds + 1):
+            day += datetime.timedelta(days=7)
+            changed = {name: {field: value + rng.randint(0, value // 5 + 3) for field, value in players[name].items()}
+                       for name in rng.sample(names, args.changed)}
+            players.update(changed)
+            store.ingest_csv(export(changed), day)
+            # the file's mtime must move even when rounds land within the clock's resolution
+            os.utime(path, ns=(round_ * 10**9, round_ * 10**9))
+
+            index = webapp.get_percentile_index()
+            found = mismatches(index, PercentileIndex.from_snapshots(store), probes)
+            if len(index) != len(PercentileIndex.from_snapshots(store)):
+                found.append(f"{len(index)} players ranked")
+            print(f"round {round_}: {len(changed)} newer snapshots -> {len(index)} players ranked"
+                  + (f", {len(found)} mismatches" if found else ""))
+            failures += [f"round {round_}: {failure}" for failure in found]
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: newer snapshots replace a player's ranked values instead of adding to them")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
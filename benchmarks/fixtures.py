@@ -0,0 +1,67 @@
+"""Stat blocks shared by the benchmark and stress scripts."""
+import os
+import random
+import sys
+from typing import Dict, List
+
+# make the app modules importable when a script is run from any directory
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# the career totals from 26Feb2025.csv, keyed like the /analyze form
+CSV_ROW_STATS = {
+    'missions_played': 2723, 'missions_won': 2614, 'successful_extractions': 2290, 'objectives_completed': 13527,
+    'terminid_kills': 78632, 'automaton_kills': 200079, 'illuminate_kills': 28615, 'friendly_kills': 925,
+    'grenade_kills': 4724, 'melee_kills': 463, 'eagle_kills': 54384,
+    'shots_fired': 731442, 'shots_hit': 378997, 'deaths': 7634, 'samples_collected': 47293, 'total_xp': 3138978,
+    'total_stratagems': 55760, 'orbitals_used': 8301, 'defensive_stratagems': 13333, 'eagles_used': 16539,
+}
+
+# a brand new account: every guard against dividing by zero missions/shots is hit
+ZERO_STATS = {field: 0 for field in CSV_ROW_STATS}
+
+# missions but no kills or shots: empty kill chart, zero accuracy
+NO_KILLS_STATS = dict(ZERO_STATS, missions_played=12, missions_won=7, successful_extractions=5,
+                      objectives_completed=30, deaths=9, samples_collected=80, total_xp=9000)
+
+FIXTURES = {
+    'csv_row': CSV_ROW_STATS,
+    'zero_missions': ZERO_STATS,
+    'no_kills': NO_KILLS_STATS,
+}
+
+
+def random_stats(rng: random.Random) -> Dict[str, int]:
+    """a plausible career stat block: counters scale with missions played"""
+    missions = rng.randint(1, 4000)
+    kills = [rng.randint(0, missions * 60) for _ in range(3)]
+    shots_fired = rng.randint(missions * 50, missions * 400)
+    strats = rng.randint(missions * 5, missions * 25)
+    return {
+        'missions_played': missions,
+        'missions_won': rng.randint(missions // 2, missions),
+        'successful_extractions': rng.randint(missions // 3, missions),
+        'objectives_completed': rng.randint(missions, missions * 6),
+        'terminid_kills': kills[0],
+        'automaton_kills': kills[1],
+        'illuminate_kills': kills[2],
+        'friendly_kills': rng.randint(0, missions // 2),
+        'grenade_kills': rng.randint(0, sum(kills) // 20),
+        'melee_kills': rng.randint(0, sum(kills) // 100),
+        'eagle_kills': rng.randint(0, sum(kills) // 5),
+        'shots_fired': shots_fired,
+        'shots_hit': rng.randint(shots_fired // 4, shots_fired * 3 // 4),
+        'deaths': rng.randint(0, missions * 5),
+        'samples_collected': rng.randint(0, missions * 25),
+        'total_xp': rng.randint(missions * 200, missions * 1500),
+        'total_stratagems': strats,
+        'orbitals_used': rng.randint(0, strats // 4),
+        'defensive_stratagems': rng.randint(0, strats // 4),
+        'eagles_used': rng.randint(0, strats // 4),
+    }
+
+
+def random_stat_blocks(count: int, seed: int = 2025) -> List[Dict[str, int]]:
+    rng = random.Random(seed)
+    return [random_stats(rng) for _ in range(count)]
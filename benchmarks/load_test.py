@@ -0,0 +1,240 @@
+"""
+Load test: how many concurrent /analyze requests one server process sustains.
+
+Starts `python app.py` on a free local port (with the current environment, plus
+any --env overrides), waits for /readyz, then runs each concurrency level in
+turn. At level C, C clients each keep one keep-alive connection and post
+random stat blocks back to back for --duration seconds. Every level reports:
+
+    throughput     successful requests per second
+    p50/p95/p99    latency of all requests, ms
+    error rate     non-200 answers, error pages and failed connections
+    RSS            peak and final resident memory of the server and its
+                   render workers (Linux /proc)
+
+    python benchmarks/load_test.py --levels 1 2 4 8 --duration 20 --output load.json --csv load.csv
+    python benchmarks/load_test.py --env RENDER_BACKEND=template --compare load.json
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+from fixtures import REPO_ROOT, random_stats
+
+# the results page heading; error.html answers 200 too, without it
+RESULTS_MARKER = b'Your Combat Analysis Results'
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """resident bytes of pid and all its descendants, None where /proc is not available"""
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pending.extend(int(child) for child in f.read().split())
+    except FileNotFoundError:
+        return total or None
+    return total
+
+
+def start_server(port: int, env_overrides: Dict[str, str], ready_timeout: float) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(port), **env_overrides)
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=REPO_ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with status {server.returncode} during start-up")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/readyz')
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"server not ready after {ready_timeout:.0f}s")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return float('nan')
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Client(threading.Thread):
+    """one virtual user: posts stat blocks on a keep-alive connection until the deadline"""
+
+    def __init__(self, port: int, path: str, seed: int, deadline: float, timeout: float):
+        super().__init__(daemon=True)
+        self.port = port
+        self.path = path
+        self.rng = random.Random(seed)
+        self.deadline = deadline
+        self.timeout = timeout
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection('127.0.0.1', self.port, timeout=self.timeout)
+
+    def run(self) -> None:
+        conn = self._connect()
+        while time.monotonic() < self.deadline:
+            body = urlencode(random_stats(self.rng))
+            start = time.perf_counter()
+            try:
+                conn.request('POST', self.path, body, {'Content-Type': 'application/x-www-form-urlencoded'})
+                response = conn.getresponse()
+                data = response.read()
+                if response.status != 200:
+                    outcome = str(response.status)
+                elif self.path == '/analyze' and RESULTS_MARKER not in data:
+                    outcome = 'error_page'
+                else:
+                    outcome = 'ok'
+            except (OSError, http.client.HTTPException) as e:
+                outcome = type(e).__name__
+                conn.close()
+                conn = self._connect()
+            self.latencies.append(time.perf_counter() - start)
+            self.outcomes[outcome] += 1
+        conn.close()
+
+
+def run_level(port: int, pid: int, path: str, concurrency: int, duration: float, timeout: float) -> dict:
+    deadline = time.monotonic() + duration
+    clients = [Client(port, path, seed=concurrency * 1000 + i, deadline=deadline, timeout=timeout)
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+
+    rss_samples = []
+    while any(client.is_alive() for client in clients):
+        rss = process_tree_rss(pid)
+        if rss is not None:
+            rss_samples.append(rss)
+        time.sleep(0.25)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    outcomes = sum((client.outcomes for client in clients), Counter())
+    requests = sum(outcomes.values())
+    errors = requests - outcomes['ok']
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(outcomes['ok'] / elapsed, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'error_rate': round(errors / requests, 4) if requests else 0.0,
+        'errors': {outcome: count for outcome, count in outcomes.items() if outcome != 'ok'},
+        'rss_peak_mib': round(max(rss_samples) / 2 ** 20, 1) if rss_samples else None,
+        'rss_end_mib': round(rss_samples[-1] / 2 ** 20, 1) if rss_samples else None,
+    }
+
+
+def print_levels(levels: List[dict], baseline: Dict[int, dict] = None) -> None:
+    print(f"{'conc':>5}{'reqs':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+          f"{'RSS peak':>10}{'RSS end':>9}")
+    for row in levels:
+        rss_peak = f"{row['rss_peak_mib']:.0f}M" if row['rss_peak_mib'] is not None else '-'
+        rss_end = f"{row['rss_end_mib']:.0f}M" if row['rss_end_mib'] is not None else '-'
+        print(f"{row['concurrency']:>5}{row['requests']:>7}{row['throughput_rps']:>8.2f}{row['p50_ms']:>9.0f}"
+              f"{row['p95_ms']:>9.0f}{row['p99_ms']:>9.0f}{row['error_rate']:>8.1%}{rss_peak:>10}{rss_end:>9}")
+        before = (baseline or {}).get(row['concurrency'])
+        if before:
+            rps, p50, p95, p99 = (ratio(row[key], before[key]) for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'))
+            print(f"{'vs before':>12}{rps:>7.2f}x{p50:>8.2f}x{p95:>8.2f}x{p99:>8.2f}x")
+
+
+def ratio(after: float, before: float) -> float:
+    return after / before if before else float('nan')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4, 8], help='concurrent clients per level')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per level')
+    parser.add_argument('--path', default='/analyze', choices=['/analyze', '/api/analyze'])
+    parser.add_argument('--timeout', type=float, default=60.0, help='seconds before a request counts as failed')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='server setting, e.g. WAITRESS_THREADS=8 (repeatable)')
+    parser.add_argument('--ready-timeout', type=float, default=120.0, help='seconds to wait for /readyz')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--csv', help='write one row per level as CSV')
+    parser.add_argument('--compare', help='JSON of an earlier run to show ratios against')
+    args = parser.parse_args()
+
+    env_overrides = dict(item.split('=', 1) for item in args.env)
+    port = free_port()
+    server = start_server(port, env_overrides, args.ready_timeout)
+    try:
+        idle_rss = process_tree_rss(server.pid)
+        levels = []
+        for concurrency in args.levels:
+            levels.append(run_level(port, server.pid, args.path, concurrency, args.duration, args.timeout))
+            print(f"level {concurrency} done: {levels[-1]['throughput_rps']:.2f} req/s", file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    results = {
+        'path': args.path,
+        'duration': args.duration,
+        'env': env_overrides,
+        'cpus': os.cpu_count(),
+        'idle_rss_mib': round(idle_rss / 2 ** 20, 1) if idle_rss is not None else None,
+        'levels': levels,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {row['concurrency']: row for row in json.load(f)['levels']}
+    print_levels(levels, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.csv:
+        columns = [key for key in levels[0] if key != 'errors']
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(levels)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
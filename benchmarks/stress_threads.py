@@ -0,0 +1,62 @@
+"""
+Stress check for concurrent /analyze requests.
+
+Renders a set of stat blocks serially, then fires the same requests from many
+threads at once through Flask's test client and verifies every response is
+byte-identical to its serial counterpart. Exits non-zero on any mismatch.
+
+    python benchmarks/stress_threads.py --requests 24 --threads 8
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# always render: cached responses would make the comparison meaningless
+os.environ['RENDER_CACHE_BYTES'] = '0'
+os.environ['FIGURE_CACHE_BYTES'] = '0'
+
+from fixtures import FIXTURES, random_stat_blocks
+
+import app as webapp
+
+
+def post_analyze(stats: dict) -> str:
+    client = webapp.app.test_client()
+    response = client.post('/analyze', data=stats)
+    assert response.status_code == 200, response.status_code
+    assert b'Error' not in response.data, 'analysis failed'
+    return hashlib.sha256(response.data).hexdigest()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=24, help='number of requests to compare')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent request threads')
+    args = parser.parse_args()
+
+    payloads = list(FIXTURES.values()) + random_stat_blocks(max(args.requests - len(FIXTURES), 0))
+
+    start = time.perf_counter()
+    serial = [post_analyze(stats) for stats in payloads]
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        concurrent = list(pool.map(post_analyze, payloads))
+    concurrent_time = time.perf_counter() - start
+
+    mismatches = [i for i, (a, b) in enumerate(zip(serial, concurrent)) if a != b]
+    print(f"{len(payloads)} requests, {args.threads} threads: "
+          f"serial {serial_time:.2f}s, concurrent {concurrent_time:.2f}s")
+    if mismatches:
+        print(f"FAIL: {len(mismatches)} responses differ from the serial run: {mismatches}")
+        return 1
+    print("OK: concurrent output is byte-identical to the serial run")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
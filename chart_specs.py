@@ -0,0 +1,122 @@
+"""
+Vega-Lite specs of the result charts, for clients that draw them themselves.
+
+Each builder mirrors the matching figure in charts.FIGURES: same panels, titles
+and value labels, with the few numbers it needs inlined as data. Building a
+spec is plain dict work, no matplotlib involved.
+"""
+from typing import Callable, Dict
+
+from analysis import CombatStatsAnalysis, EnemyKillStats
+
+SCHEMA = 'https://vega.github.io/schema/vega-lite/v5.json'
+
+
+def bar_spec(values: Dict[str, float], x: str, y: str, title: str, label_format: str = '.2f',
+             labels: Dict[str, float] = None) -> dict:
+    """
+    Bars with their value printed on top, like charts.add_value_labels.
+
+    Args:
+        labels: numbers to print instead of the bar heights (for scaled bars)
+    """
+    if labels is None:
+        labels = values
+    return {
+        'title': title,
+        'data': {'values': [{x: k, y: v, 'label': labels[k]} for k, v in values.items()]},
+        'encoding': {
+            'x': {'field': x, 'type': 'nominal', 'sort': None, 'axis': {'labelAngle': -45}},
+            'y': {'field': y, 'type': 'quantitative'},
+        },
+        'layer': [
+            {'mark': 'bar', 'encoding': {'color': {'field': x, 'type': 'nominal', 'legend': None, 'sort': None}}},
+            {
+                'mark': {'type': 'text', 'baseline': 'bottom', 'dy': -2},
+                'transform': [{'filter': f'datum["{y}"] > 0'}],
+                'encoding': {'text': {'field': 'label', 'type': 'quantitative', 'format': label_format}},
+            },
+        ],
+    }
+
+
+def pie_spec(values: Dict[str, float], title: str, colors: Dict[str, str] = None) -> dict:
+    """pie with percentage labels; zero slices are left out like in the PNG"""
+    color = {'field': 'label', 'type': 'nominal', 'sort': None}
+    if colors is not None:
+        # fixed per label, so a pie missing a zero slice keeps the other colors
+        color['scale'] = {'domain': list(colors), 'range': list(colors.values())}
+    return {
+        'title': title,
+        'data': {'values': [{'label': k, 'value': v} for k, v in values.items() if v > 0]},
+        'transform': [
+            {'joinaggregate': [{'op': 'sum', 'field': 'value', 'as': 'total'}]},
+            {'calculate': 'datum.value / datum.total', 'as': 'share'},
+        ],
+        'encoding': {
+            'theta': {'field': 'value', 'type': 'quantitative', 'stack': True},
+            'color': color,
+        },
+        'layer': [
+            {'mark': {'type': 'arc', 'outerRadius': 100}},
+            {'mark': {'type': 'text', 'radius': 65},
+             'encoding': {'text': {'field': 'share', 'type': 'quantitative', 'format': '.1%'}}},
+        ],
+    }
+
+
+def kill_distribution_spec(stats_dict: dict, analysis: CombatStatsAnalysis) -> dict:
+    kills_data = EnemyKillStats(
+        terminid_kills=stats_dict['terminid_kills'],
+        automaton_kills=stats_dict['automaton_kills'],
+        illuminate_kills=stats_dict['illuminate_kills'],
+        friendly_kills=stats_dict['friendly_kills']
+    ).to_dict()
+    panels = []
+    if sum(kills_data.values()) > 0:  # the PNG is empty without kills too
+        panels = [bar_spec(kills_data, 'Enemy Type', 'Kills', "Kills by Enemy Type", '.0f'),
+                  pie_spec(kills_data, "Enemy Kills Distribution")]
+    return {'$schema': SCHEMA, 'title': "Enemy Kill Distribution Analysis", 'vconcat': panels}
+
+
+def combat_performance_spec(stats_dict: dict, analysis: CombatStatsAnalysis) -> dict:
+    return {
+        '$schema': SCHEMA,
+        'title': "Combat Performance Analysis",
+        'vconcat': [
+            bar_spec(analysis.efficiency_metrics, 'Metric', 'Value', 'Performance Metrics per Mission'),
+            bar_spec(analysis.combat_style, 'Style', 'Kills', 'Combat Style Distribution', ',.0f'),
+            bar_spec(analysis.stratagem_efficiency, 'Stratagem', 'Usage per Mission', 'Stratagem Usage per Mission'),
+        ],
+    }
+
+
+def rewards_spec(stats_dict: dict, analysis: CombatStatsAnalysis) -> dict:
+    # XP is scaled down to share an axis with samples, its label shows the real value
+    rewards = {'Samples per Mission': analysis.samples_per_mission,
+               'XP per Mission (÷100)': analysis.xp_per_mission / 100}
+    labels = {'Samples per Mission': analysis.samples_per_mission,
+              'XP per Mission (÷100)': analysis.xp_per_mission}
+    panels = [bar_spec(rewards, 'Metric', 'Value', 'Reward Metrics per Mission', '.1f', labels)]
+    played = stats_dict['missions_played']
+    if played > 0:
+        won = stats_dict['missions_won']
+        panels.append(pie_spec({'Successful Missions': won, 'Failed Missions': played - won},
+                               'Mission Success Rate',
+                               colors={'Successful Missions': '#4CAF50', 'Failed Missions': '#F44336'}))
+    return {'$schema': SCHEMA, 'title': "Rewards and Mission Success Metrics", 'hconcat': panels,
+            'resolve': {'scale': {'color': 'independent'}}}
+
+
+# spec builders, keyed and ordered like charts.FIGURES
+CHART_SPECS: Dict[str, Callable[[dict, CombatStatsAnalysis], dict]] = {
+    'kill_distribution': kill_distribution_spec,
+    'combat_performance': combat_performance_spec,
+    'rewards': rewards_spec,
+}
+
+
+def chart_specs(stats_dict: dict, analysis: CombatStatsAnalysis = None) -> Dict[str, dict]:
+    if analysis is None:
+        analysis = CombatStatsAnalysis(stats_dict)
+    return {name: build(stats_dict, analysis) for name, build in CHART_SPECS.items()}
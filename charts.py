@@ -0,0 +1,141 @@
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+import seaborn as sns
+from typing import Callable, Dict
+from matplotlib.artist import setp
+from matplotlib.figure import Figure
+
+import metrics
+from analysis import EnemyKillStats, CombatStatsAnalysis
+from image_formats import ImageOptions
+# re-exported: these used to live here
+from mpl_utils import add_value_labels, fig_to_base64, fig_to_image, fig_to_png, new_figure
+
+
+def create_kill_distribution_chart(stats_dict: dict, analysis: CombatStatsAnalysis) -> Figure:
+    """1. kill distribution chart: kills by enemy type as bars and a pie"""
+    fig = new_figure(figsize=(12, 8))
+    fig.suptitle("Enemy Kill Distribution Analysis", fontsize=16)
+
+    # bar plot
+    ax1 = fig.add_subplot(2, 1, 1)
+    enemy_stats = EnemyKillStats(
+        terminid_kills=stats_dict['terminid_kills'],
+        automaton_kills=stats_dict['automaton_kills'],
+        illuminate_kills=stats_dict['illuminate_kills'],
+        friendly_kills=stats_dict['friendly_kills']
+    )
+
+    kills_data = enemy_stats.to_dict()
+    kills_df = pd.DataFrame(list(kills_data.items()), columns=['Enemy Type', 'Kills'])
+
+    if kills_df['Kills'].sum() > 0:  # only create chart if there are kills
+        sns.barplot(x='Enemy Type', y='Kills', data=kills_df, ax=ax1)
+        ax1.set_title("Kills by Enemy Type")
+        setp(ax1.get_xticklabels(), rotation=45, ha='right')
+        add_value_labels(ax1, format_str='{:.0f}')
+
+        # Pie chart
+        ax2 = fig.add_subplot(2, 1, 2)
+        kill_values = [v for v in kills_data.values() if v > 0]
+        kill_labels = [k for k, v in kills_data.items() if v > 0]
+
+        if kill_values:
+            ax2.pie(kill_values, labels=kill_labels, autopct='%1.1f%%')
+            ax2.set_title("Enemy Kills Distribution")
+
+    fig.tight_layout()
+    return fig
+
+
+def create_combat_performance_chart(stats_dict: dict, analysis: CombatStatsAnalysis) -> Figure:
+    """2. main analysis chart: efficiency, combat style and stratagem usage"""
+    fig = new_figure(figsize=(14, 12))
+    axs = fig.subplots(3, 1)
+    fig.suptitle("Combat Performance Analysis", fontsize=16)
+
+    # efficiency metrics
+    metrics_df = pd.DataFrame(list(analysis.efficiency_metrics.items()),
+                              columns=['Metric', 'Value'])
+    sns.barplot(data=metrics_df, x='Metric', y='Value', ax=axs[0])
+    axs[0].set_title('Performance Metrics per Mission')
+    axs[0].tick_params(axis='x', rotation=45)
+    add_value_labels(axs[0])
+
+    #combat style
+    combat_df = pd.DataFrame(list(analysis.combat_style.items()),
+                             columns=['Style', 'Kills'])
+    sns.barplot(data=combat_df, x='Style', y='Kills', ax=axs[1])
+    axs[1].set_title('Combat Style Distribution')
+    axs[1].tick_params(axis='x', rotation=45)
+    add_value_labels(axs[1], '{:,.0f}')
+
+    #stratagem efficiency
+    stratagem_df = pd.DataFrame(list(analysis.stratagem_efficiency.items()),
+                                columns=['Stratagem', 'Usage per Mission'])
+    sns.barplot(data=stratagem_df, x='Stratagem', y='Usage per Mission', ax=axs[2])
+    axs[2].set_title('Stratagem Usage per Mission')
+    axs[2].tick_params(axis='x', rotation=45)
+    add_value_labels(axs[2])
+
+    fig.tight_layout(rect=[0, 0, 1, 0.97])
+    return fig
+
+
+def create_rewards_chart(stats_dict: dict, analysis: CombatStatsAnalysis) -> Figure:
+    """3. rewards and success metrics"""
+    fig = new_figure(figsize=(14, 6))
+    ax1, ax2 = fig.subplots(1, 2)
+    fig.suptitle("Rewards and Mission Success Metrics", fontsize=16)
+
+    # rewards bar chart
+    metrics = {
+        'Samples per Mission': analysis.samples_per_mission,
+        'XP per Mission (÷100)': analysis.xp_per_mission / 100
+    }
+    metrics_df = pd.DataFrame(list(metrics.items()), columns=['Metric', 'Value'])
+
+    sns.barplot(x='Metric', y='Value', data=metrics_df, ax=ax1)
+    ax1.set_title('Reward Metrics per Mission')
+
+    for i, v in enumerate(metrics_df['Value']):
+        if metrics_df['Metric'].iloc[i] == 'XP per Mission (÷100)':
+            ax1.text(i, v + max(metrics_df['Value']) * 0.01, f"{v*100:.1f}", ha='center')
+        else:
+            ax1.text(i, v + max(metrics_df['Value']) * 0.01, f"{v:.1f}", ha='center')
+
+    # Mission success pie chart
+    missions_won = stats_dict['missions_won']
+    missions_failed = stats_dict['missions_played'] - missions_won
+
+    if stats_dict['missions_played'] > 0:
+        labels = ['Successful Missions', 'Failed Missions']
+        sizes = [missions_won, missions_failed]
+        colors = ['#4CAF50', '#F44336']
+        ax2.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors)
+        ax2.set_title('Mission Success Rate')
+
+    fig.tight_layout(rect=[0, 0, 1, 0.95])
+    return fig
+
+
+# figure builders in the order the results page shows them
+FIGURES: Dict[str, Callable[[dict, CombatStatsAnalysis], Figure]] = {
+    'kill_distribution': create_kill_distribution_chart,
+    'combat_performance': create_combat_performance_chart,
+    'rewards': create_rewards_chart,
+}
+
+
+def render_figure(name: str, stats_dict: dict, analysis: CombatStatsAnalysis = None,
+                  image: ImageOptions = ImageOptions()) -> bytes:
+    """build one named figure and return it as image bytes (PNG by default)"""
+    if analysis is None:
+        analysis = CombatStatsAnalysis(stats_dict)
+
+    # figures outside pyplot are freed with their last reference, no close() needed
+    with metrics.stage('build', name):
+        fig = FIGURES[name](stats_dict, analysis)
+    with metrics.stage('encode', name):
+        return fig_to_image(fig, image)
@@ -0,0 +1,161 @@
+"""
+Side-by-side comparison of any number of players (a squad or a whole clan).
+
+Every long-form table is one melt of the vectorized metrics table, so the
+tables cost the same per player whether two or two hundred are compared.
+"""
+import math
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.artist import setp
+from matplotlib.figure import Figure
+
+from analysis import EFFICIENCY_METRICS, COMBAT_STYLE_METRICS, compute_metrics
+from batch import player_column, read_stat_chunks
+from charts import add_value_labels, new_figure
+from player_stats import array_columns, from_columns, has_time_column
+
+# EnemyKillStats.to_dict labels -> stat field
+ENEMY_COLUMNS = {
+    "Terminid Kills": 'terminid_kills',
+    "Automaton Kills": 'automaton_kills',
+    "Illuminate Kills": 'illuminate_kills',
+    "Friendly Kills": 'friendly_kills',
+}
+SUCCESS_METRICS = {
+    "Mission Success Rate(%)": 'mission_success_rate',
+    "Extraction Rate(%)": 'extraction_rate',
+    "XP per Mission (÷100)": 'xp_per_mission_scaled',
+}
+
+# above this many players the per-bar value labels are left off, they would overlap
+MAX_LABELED_PLAYERS = 4
+
+
+def comparison_frame(data: pd.DataFrame, player_names: Sequence[str] = None) -> pd.DataFrame:
+    """
+    One wide row per player with a Player column, every metric and the enemy kill counts.
+
+    Args:
+        data: career stats rows (form field names or export headers)
+        player_names: defaults to the CSV's player column, else "Player 1".."Player N"
+    """
+    columns = array_columns(from_columns(data), with_time=has_time_column(data))
+    wide = pd.DataFrame(compute_metrics(columns))
+    if player_names is None:
+        name_column = player_column(data)
+        if name_column is not None:
+            player_names = data[name_column].astype(str).to_numpy()
+        else:
+            player_names = [f"Player {i + 1}" for i in range(len(wide))]
+    wide.insert(0, 'Player', list(player_names))
+
+    for field in ENEMY_COLUMNS.values():
+        wide[field] = np.asarray(columns[field], dtype=np.int64)
+    # share of each enemy type in the kills that count (friendly kills are not in total_kills)
+    total = wide['total_kills'].to_numpy()
+    for field in ENEMY_COLUMNS.values():
+        share = np.zeros(len(wide))
+        np.divide(wide[field].to_numpy(), total, out=share, where=total > 0)
+        wide[f'{field}_share'] = share * 100
+    wide['xp_per_mission_scaled'] = wide['xp_per_mission'] / 100
+    return wide
+
+
+def melt_metrics(wide: pd.DataFrame, labels: Dict[str, str], var_name: str, value_name: str) -> pd.DataFrame:
+    """long form (var_name, Player, value_name) of the given label -> column map, metric-major"""
+    renamed = wide[['Player', *labels.values()]].rename(columns={c: l for l, c in labels.items()})
+    return renamed.melt(id_vars='Player', var_name=var_name, value_name=value_name)
+
+
+def comparison_tables(wide: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """every long-form table the comparison charts plot"""
+    return {
+        'efficiency': melt_metrics(wide, EFFICIENCY_METRICS, 'Metric', 'Value'),
+        'combat_style': melt_metrics(wide, COMBAT_STYLE_METRICS, 'Style', 'Kills'),
+        'success': melt_metrics(wide, SUCCESS_METRICS, 'Metric', 'Value'),
+        'enemy_kills': melt_metrics(wide, ENEMY_COLUMNS, 'Enemy', 'Kills'),
+        'enemy_share': melt_metrics(wide, {label: f'{field}_share' for label, field in ENEMY_COLUMNS.items()},
+                                    'Enemy', 'Share(%)'),
+    }
+
+
+def _figure_width(players: int) -> float:
+    """room for one bar per player in each group, up to a readable maximum"""
+    return min(48, max(16, 0.15 * players * len(EFFICIENCY_METRICS)))
+
+
+def _grouped_bars(ax, table: pd.DataFrame, x: str, y: str, title: str, format_str: str) -> None:
+    # one value per bar, so no error bars to bootstrap
+    sns.barplot(data=table, x=x, y=y, hue='Player', errorbar=None, ax=ax)
+    ax.set_title(title)
+    setp(ax.get_xticklabels(), rotation=30, ha='right')
+    ax.get_legend().remove()  # every axes has the same hue order, _player_legend draws one for all
+    if table['Player'].nunique() <= MAX_LABELED_PLAYERS:
+        add_value_labels(ax, format_str)
+
+
+def _player_legend(fig: Figure, ax, players: int) -> float:
+    """
+    One legend for the whole figure, right of the axes; laying out a legend
+    with an entry per player dominates the draw time, so it is not repeated per axes.
+
+    Returns:
+        the right edge for tight_layout's rect, leaving room for the legend
+    """
+    columns = math.ceil(players / 25)
+    handles, labels = ax.get_legend_handles_labels()
+    fig.legend(handles, labels, loc='center right', ncol=columns, fontsize='small')
+    return 1 - min(0.4, 0.08 * columns * 16 / fig.get_figwidth())
+
+
+def create_metrics_comparison_chart(tables: Dict[str, pd.DataFrame]) -> Figure:
+    """efficiency, combat style and success metrics, one bar per player in each group"""
+    players = tables['efficiency']['Player'].nunique()
+    fig = new_figure(figsize=(_figure_width(players), 15))
+    axs = fig.subplots(3, 1)
+    fig.suptitle(f"Comparison of {players} Players", fontsize=20)
+
+    _grouped_bars(axs[0], tables['efficiency'], 'Metric', 'Value', "Efficiency Metrics Comparison", '{:.1f}')
+    _grouped_bars(axs[1], tables['combat_style'], 'Style', 'Kills', "Combat Style Comparison", '{:,.0f}')
+    _grouped_bars(axs[2], tables['success'], 'Metric', 'Value', "Success Metrics Comparison", '{:.1f}')
+
+    right = _player_legend(fig, axs[0], players)
+    fig.tight_layout(rect=[0, 0, right, 0.97])
+    return fig
+
+
+def create_enemy_kills_comparison_chart(tables: Dict[str, pd.DataFrame]) -> Figure:
+    """kills by enemy type and each player's kill share per enemy type"""
+    players = tables['enemy_kills']['Player'].nunique()
+    fig = new_figure(figsize=(_figure_width(players), 12))
+    axs = fig.subplots(2, 1)
+    fig.suptitle("Enemy Kill Distribution Comparison", fontsize=20)
+
+    _grouped_bars(axs[0], tables['enemy_kills'], 'Enemy', 'Kills', "Kills by Enemy Type", '{:,.0f}')
+    _grouped_bars(axs[1], tables['enemy_share'], 'Enemy', 'Share(%)', "Share of Kills by Enemy Type", '{:.1f}')
+
+    right = _player_legend(fig, axs[0], players)
+    fig.tight_layout(rect=[0, 0, right, 0.97])
+    return fig
+
+
+# comparison figures in page order
+COMPARISON_FIGURES = {
+    'metrics': create_metrics_comparison_chart,
+    'enemy_kills': create_enemy_kills_comparison_chart,
+}
+
+
+def read_players(source) -> pd.DataFrame:
+    """career stats CSV (path or file-like object) with the headers stripped"""
+    return pd.concat(read_stat_chunks(source), ignore_index=True)
+
+
+def build_comparison(wide: pd.DataFrame) -> List[Figure]:
+    """all comparison figures for the players of a comparison_frame"""
+    tables = comparison_tables(wide)
+    return [build(tables) for build in COMPARISON_FIGURES.values()]
@@ -0,0 +1,123 @@
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# "931:20:00" as stored in the "In Mission Time" column of the career export
+HMS_PATTERN = r'^(\d+):([0-5]?\d):([0-5]?\d)$'
+# "38d 19h 20m 0s" as shown in game; any subset of the units, in this order
+DHMS_PATTERN = r'^(?:(\d+)\s*d)?\s*(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?\s*(?:(\d+)\s*s)?$'
+
+
+def _parse_hms_bytes(values: np.ndarray) -> np.ndarray:
+    """
+    Parse "H...H:MM:SS" on the raw ASCII bytes of the whole column at once.
+
+    Returns:
+        float seconds, NaN for every value that does not have exactly this layout
+    """
+    try:
+        raw = np.asarray(values, dtype='S')
+    except (UnicodeEncodeError, ValueError):
+        return np.full(len(values), np.nan)
+    if raw.dtype.itemsize < 7:
+        return np.full(len(values), np.nan)
+
+    chars = raw.view(np.uint8).reshape(len(raw), raw.dtype.itemsize)
+    length = (chars != 0).sum(axis=1)
+    digits = chars.astype(np.int64) - ord('0')
+    # position counted from the end of each string: 1 = last character
+    rel = length[:, None] - np.arange(chars.shape[1])[None, :]
+    in_string = rel >= 1
+    colon_slot = (rel == 6) | (rel == 3)
+
+    is_digit = (digits >= 0) & (digits <= 9)
+    layout_ok = np.where(in_string, np.where(colon_slot, chars == ord(':'), is_digit), True).all(axis=1)
+
+    hour_weight = np.where(rel >= 7, 10 ** np.clip(rel - 7, 0, 18), 0)
+    hours = (digits * hour_weight).sum(axis=1)
+    minutes = (digits * ((rel == 5) * 10 + (rel == 4))).sum(axis=1)
+    secs = (digits * ((rel == 2) * 10 + (rel == 1))).sum(axis=1)
+
+    ok = (length >= 7) & layout_ok & (minutes < 60) & (secs < 60)
+    return np.where(ok, hours * 3600 + minutes * 60 + secs, np.nan)
+
+
+def _parse_slow(text: 'pd.Series') -> 'pd.Series':
+    """regex parse of the values the byte parser could not handle; NaN where nothing matches"""
+    import pandas as pd
+
+    hms = text.str.extract(HMS_PATTERN).astype('float64')
+    dhms = text.str.extract(DHMS_PATTERN, flags=re.IGNORECASE).astype('float64')
+    plain = pd.to_numeric(text, errors='coerce')
+
+    from_hms = hms[0] * 3600 + hms[1] * 60 + hms[2]
+    from_dhms = (dhms.fillna(0) * [86400, 3600, 60, 1]).sum(axis=1)
+    # the all-optional pattern also matches "", only count it when a unit was present
+    from_dhms = from_dhms.where(dhms.notna().any(axis=1))
+    return from_hms.fillna(from_dhms).fillna(plain).astype('float64')
+
+
+def parse_durations(values, errors: str = 'raise', missing: int = 0) -> np.ndarray:
+    """
+    Convert a column of durations to integer seconds without a per-row Python loop.
+
+    Args:
+        values: sequence/Series of "HHH:MM:SS" or "#d #h #m #s" strings, or numbers of seconds
+        errors: 'raise' for a ValueError on unparseable values, 'coerce' to turn them into 0
+        missing: seconds given to empty cells (blank, None or NaN)
+    Returns:
+        int64 array of seconds, same length as values
+    """
+    import pandas as pd  # imported on first use, pandas is slow to import
+
+    series = pd.Series(values).reset_index(drop=True)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.fillna(missing).to_numpy(dtype=np.int64)
+
+    # the export's own HHH:MM:SS form goes through the byte parser, the rest through regexes
+    seconds = pd.Series(_parse_hms_bytes(series.to_numpy(dtype=object)))
+    rest = seconds.isna()
+    if rest.any():
+        text = series[rest].astype('string').str.strip()
+        seconds[rest] = _parse_slow(text)
+        empty = rest & text.reindex(seconds.index).fillna('').eq('')
+        bad = seconds.isna() & ~empty
+        if bad.any() and errors == 'raise':
+            raise ValueError(f"unrecognized duration {series[bad].iloc[0]!r}, "
+                             f"expected HHH:MM:SS or #d #h #m #s")
+        seconds[empty] = missing
+    return seconds.fillna(0).to_numpy(dtype=np.int64)
+
+
+def parse_duration(value) -> int:
+    """scalar form of parse_durations; plain regexes, so a single form value does not import pandas"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float, np.number)):
+        return 0 if value != value else int(value)  # NaN counts as an empty cell
+
+    text = str(value).strip()
+    if not text:
+        return 0
+    hms = re.search(HMS_PATTERN, text)
+    if hms:
+        hours, minutes, secs = map(int, hms.groups())
+        return hours * 3600 + minutes * 60 + secs
+    dhms = re.search(DHMS_PATTERN, text, flags=re.IGNORECASE)
+    if dhms and any(group is not None for group in dhms.groups()):
+        return sum(int(group or 0) * unit for group, unit in zip(dhms.groups(), (86400, 3600, 60, 1)))
+    try:
+        return int(float(text))
+    except ValueError:
+        raise ValueError(f"unrecognized duration {value!r}, expected HHH:MM:SS or #d #h #m #s") from None
+
+
+def format_duration(seconds: int) -> str:
+    """seconds back to the HHH:MM:SS form of the export (hours are not wrapped into days)"""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
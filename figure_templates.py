@@ -0,0 +1,185 @@
+import queue
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from matplotlib.figure import Figure, SubplotParams
+from matplotlib.layout_engine import TightLayoutEngine
+
+import metrics
+import mpl_charts
+from analysis import CombatStatsAnalysis, EnemyKillStats
+from image_formats import ImageOptions
+from mpl_utils import fig_to_image
+from rendering import WARMUP_STATS
+
+
+def _autoscale_y(ax) -> None:
+    """refit the y limits to the new bars; x keeps the categorical limits"""
+    ax.relim()
+    ax.autoscale_view(scalex=False)
+
+
+def _tight_layout(fig: Figure, rect=(0, 0, 1, 1)) -> None:
+    """same as fig.tight_layout() on a fresh figure, without leaving a layout engine behind"""
+    # tight layout depends on the starting positions, so start from the defaults again
+    defaults = SubplotParams()
+    fig.subplots_adjust(left=defaults.left, bottom=defaults.bottom, right=defaults.right,
+                        top=defaults.top, wspace=defaults.wspace, hspace=defaults.hspace)
+    TightLayoutEngine(rect=rect).execute(fig)
+
+
+def _update_bars(ax, values: List[float], format_str: str) -> None:
+    """set bar heights and the add_value_labels text on top of each bar"""
+    for rect, text, value in zip(ax.patches, ax.texts, values):
+        rect.set_height(value)
+        text.set_y(value)
+        text.set_text(format_str.format(value))
+        text.set_visible(value > 0)  # add_value_labels skips empty bars
+    _autoscale_y(ax)
+
+
+def _redraw_pie(ax, values: List[float], labels: List[str], colors: List[str]) -> None:
+    """replace the wedges and their labels, keeping the axes and its title"""
+    for artist in list(ax.patches) + list(ax.texts):
+        artist.remove()
+    ax.pie(values, labels=labels, autopct='%1.1f%%', colors=colors)
+
+
+class FigureTemplate(ABC):
+    """A pre-built figure whose bars, labels and pie wedges are updated per request."""
+
+    name = ''
+
+    def __init__(self):
+        # the warm-up block gives every bar, value label and pie wedge a positive
+        # value, so the template holds the full artist structure
+        self.fig = mpl_charts.FIGURES[self.name](WARMUP_STATS, CombatStatsAnalysis(WARMUP_STATS))
+
+    @abstractmethod
+    def update(self, stats_dict: dict, analysis: CombatStatsAnalysis) -> Optional[Figure]:
+        """
+        Load new data into the template.
+
+        Returns:
+            the updated figure, or None when the data needs a layout the
+            template does not have (e.g. an empty chart) and must be built fresh
+        """
+
+
+class KillDistributionTemplate(FigureTemplate):
+    name = 'kill_distribution'
+
+    def update(self, stats_dict, analysis):
+        kills_data = EnemyKillStats(
+            terminid_kills=stats_dict['terminid_kills'],
+            automaton_kills=stats_dict['automaton_kills'],
+            illuminate_kills=stats_dict['illuminate_kills'],
+            friendly_kills=stats_dict['friendly_kills']
+        ).to_dict()
+        if sum(kills_data.values()) <= 0:
+            return None  # the fresh chart has no bars and no pie axes at all
+
+        bar_ax, pie_ax = self.fig.axes
+        _update_bars(bar_ax, list(kills_data.values()), '{:.0f}')
+
+        present = [(k, v) for k, v in kills_data.items() if v > 0]
+        _redraw_pie(pie_ax, [v for _, v in present], [k for k, _ in present],
+                    [f'C{i}' for i in range(len(present))])
+
+        _tight_layout(self.fig)
+        return self.fig
+
+
+class CombatPerformanceTemplate(FigureTemplate):
+    name = 'combat_performance'
+
+    def update(self, stats_dict, analysis):
+        metrics_ax, combat_ax, stratagem_ax = self.fig.axes
+        _update_bars(metrics_ax, list(analysis.efficiency_metrics.values()), '{:.2f}')
+        _update_bars(combat_ax, list(analysis.combat_style.values()), '{:,.0f}')
+        _update_bars(stratagem_ax, list(analysis.stratagem_efficiency.values()), '{:.2f}')
+
+        _tight_layout(self.fig, rect=(0, 0, 1, 0.97))
+        return self.fig
+
+
+class RewardsTemplate(FigureTemplate):
+    name = 'rewards'
+
+    def update(self, stats_dict, analysis):
+        if stats_dict['missions_played'] <= 0:
+            return None  # the fresh chart keeps an empty, framed axes instead of the pie
+
+        bar_ax, pie_ax = self.fig.axes
+        values = [analysis.samples_per_mission, analysis.xp_per_mission / 100]
+        offset = max(values) * 0.01
+        for i, (rect, text, v) in enumerate(zip(bar_ax.patches, bar_ax.texts, values)):
+            rect.set_height(v)
+            text.set_position((i, v + offset))
+            # the XP bar is scaled down by 100, its label shows the real value
+            text.set_text(f"{v*100:.1f}" if i == 1 else f"{v:.1f}")
+        _autoscale_y(bar_ax)
+
+        missions_won = stats_dict['missions_won']
+        _redraw_pie(pie_ax, [missions_won, stats_dict['missions_played'] - missions_won],
+                    ['Successful Missions', 'Failed Missions'], ['#4CAF50', '#F44336'])
+
+        _tight_layout(self.fig, rect=(0, 0, 1, 0.95))
+        return self.fig
+
+
+TEMPLATE_CLASSES = {cls.name: cls for cls in (KillDistributionTemplate, CombatPerformanceTemplate, RewardsTemplate)}
+
+
+class FigureTemplatePool:
+    """
+    Keeps up to `size` idle templates per figure.
+
+    A template is checked out by one thread for the whole update + encode, so
+    concurrent requests never share a figure; a miss builds a new template.
+    """
+
+    def __init__(self, size: int = 4):
+        self.size = size
+        self._idle: Dict[str, queue.Queue] = {name: queue.Queue(maxsize=size) for name in TEMPLATE_CLASSES}
+
+    def _checkout(self, name: str) -> FigureTemplate:
+        try:
+            return self._idle[name].get_nowait()
+        except queue.Empty:
+            return TEMPLATE_CLASSES[name]()
+
+    def _release(self, template: FigureTemplate) -> None:
+        try:
+            self._idle[template.name].put_nowait(template)
+        except queue.Full:
+            pass  # pool already holds `size` templates, let this one be collected
+
+    def render(self, name: str, stats_dict: dict, analysis: CombatStatsAnalysis = None,
+               image: ImageOptions = ImageOptions()) -> bytes:
+        """render one named figure to image bytes through a pooled template"""
+        if analysis is None:
+            analysis = CombatStatsAnalysis(stats_dict)
+
+        template = self._checkout(name)
+        try:
+            with metrics.stage('build', name):
+                fig = template.update(stats_dict, analysis)
+            if fig is None:
+                return mpl_charts.render_figure(name, stats_dict, analysis, image)
+            with metrics.stage('encode', name):
+                return fig_to_image(fig, image)
+        except Exception:
+            # a half-updated template must not be reused
+            template = None
+            raise
+        finally:
+            if template is not None:
+                self._release(template)
+
+    def idle_count(self, name: str) -> int:
+        return self._idle[name].qsize()
+
+
+# per-process pool used by the 'template' render backend
+TEMPLATE_POOL = FigureTemplatePool()
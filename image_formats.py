@@ -0,0 +1,82 @@
+"""
+Output formats of the rendered charts.
+
+Plain data with no matplotlib import, so the app can parse its configuration
+and negotiate a format per request before anything is rendered; the encoding
+itself is mpl_utils.fig_to_image.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+# format name -> (mimetype, file extension)
+IMAGE_FORMATS: Dict[str, Tuple[str, str]] = {
+    'png': ('image/png', 'png'),     # full color, what savefig writes by default
+    'png8': ('image/png', 'png'),    # palette-quantized png
+    'webp': ('image/webp', 'webp'),  # lossless webp
+    'svg': ('image/svg+xml', 'svg'),
+}
+
+# smaller stand-ins for the full color png: webp is lossless, png8 a close
+# palette approximation (octree quantized, about 43 dB PSNR); a client that
+# accepts webp gets it in preference to png8 when the format is negotiated
+NEGOTIATED_FORMATS = ('webp', 'png8')
+
+
+@dataclass(frozen=True)
+class ImageOptions:
+    """
+    How a figure is written out.
+
+    Attributes:
+        format: a key of IMAGE_FORMATS
+        dpi: raster resolution (svg only uses it for embedded images)
+        compression: zlib level 0-9 for png/png8, scaled to webp's 0-6 effort; svg ignores it
+        colors: palette size of png8
+    """
+    format: str = 'png'
+    dpi: int = 100
+    compression: int = 6
+    colors: int = 256
+
+    def __post_init__(self):
+        if self.format not in IMAGE_FORMATS:
+            raise ValueError(f"unknown image format {self.format!r}, expected one of {tuple(IMAGE_FORMATS)}")
+        if not 0 <= self.compression <= 9:
+            raise ValueError(f"image compression must be 0-9, got {self.compression}")
+        if not 2 <= self.colors <= 256:
+            raise ValueError(f"png8 palette must have 2-256 colors, got {self.colors}")
+        if self.dpi <= 0:
+            raise ValueError(f"image dpi must be positive, got {self.dpi}")
+
+    @property
+    def mimetype(self) -> str:
+        return IMAGE_FORMATS[self.format][0]
+
+    @property
+    def extension(self) -> str:
+        return IMAGE_FORMATS[self.format][1]
+
+    @property
+    def tag(self) -> str:
+        """short id of the options for cache keys, e.g. 'png8-100-6-256'"""
+        return f"{self.format}-{self.dpi}-{self.compression}-{self.colors}"
+
+
+def negotiate_format(requested: Optional[str], accepted: Iterable[str], default: str) -> str:
+    """
+    Pick the image format of one response. 'auto', whether requested or
+    configured, means webp if the client accepts it, else png8.
+
+    Args:
+        requested: format asked for explicitly (query/form field), wins when set
+        accepted: mimetypes the client listed in its Accept header (wildcards do not count)
+        default: configured format
+    """
+    choice = requested or default
+    if choice != 'auto':
+        return choice
+    accepted = set(accepted)
+    for name in NEGOTIATED_FORMATS:
+        if IMAGE_FORMATS[name][0] in accepted:
+            return name
+    return 'png8'
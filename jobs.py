@@ -0,0 +1,149 @@
+"""
+Bounded queue of background render jobs.
+
+In job mode /analyze only parses the form and enqueues the render, so the
+request threads stay free for `/`, polling and everything else however many
+renders are waiting. A full queue is refused right away (the caller answers
+503 with Retry-After) instead of piling more work onto the server.
+"""
+import logging
+import math
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# job states, in order
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+FINISHED = (DONE, FAILED)
+
+
+class QueueFull(Exception):
+    """the job queue is at capacity; retry_after is a guess in whole seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"render queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    id: str
+    fn: Callable
+    args: tuple
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: object = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """status for the polling / SSE endpoints (no result payload)"""
+        now = time.monotonic()
+        waited = (self.started_at or now) - self.submitted_at
+        info = {'id': self.id, 'status': self.status, 'wait_seconds': round(waited, 3)}
+        if self.started_at is not None:
+            info['run_seconds'] = round((self.finished_at or now) - self.started_at, 3)
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+
+class JobQueue:
+    """
+    `workers` threads take jobs from a queue of at most `maxsize` waiting jobs.
+
+    Finished jobs are kept for `ttl` seconds so their result can be fetched,
+    and every status change wakes up the threads blocked in wait_change().
+    """
+
+    def __init__(self, maxsize: int = 16, workers: int = 1, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.ttl = ttl
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._threads = []
+        # moving average of job run time, for the Retry-After estimate
+        self._mean_run = 1.0
+
+    def _start_workers(self) -> None:
+        # called with the lock held; workers start on the first submit, not at import
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'render-job-{len(self._threads)}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _prune(self) -> None:
+        """drop finished jobs past their ttl; called with the lock held"""
+        cutoff = time.monotonic() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.status in FINISHED and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def retry_after(self) -> int:
+        """seconds until a slot is likely free: the queue drained at the mean run time"""
+        depth = self._queue.qsize()
+        return max(1, math.ceil(self._mean_run * (depth + 1) / self.workers))
+
+    def submit(self, fn: Callable, *args) -> Job:
+        """enqueue fn(*args); raises QueueFull instead of blocking"""
+        job = Job(id=secrets.token_urlsafe(16), fn=fn, args=args)
+        with self._lock:
+            self._prune()
+            self._start_workers()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                metrics.JOB_EVENTS.inc(event='rejected')
+                raise QueueFull(self.retry_after()) from None
+            self._jobs[job.id] = job
+        metrics.JOB_EVENTS.inc(event='submitted')
+        metrics.JOB_QUEUE_DEPTH.set(self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def wait_change(self, job: Job, status: str, timeout: float) -> str:
+        """block until the job leaves `status` or timeout passes; returns the current status"""
+        with self._changed:
+            self._changed.wait_for(lambda: job.status != status, timeout)
+            return job.status
+
+    def _set_status(self, job: Job, status: str) -> None:
+        with self._changed:
+            job.status = status
+            self._changed.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            metrics.JOB_QUEUE_DEPTH.set(self._queue.qsize())
+            job.started_at = time.monotonic()
+            metrics.JOB_WAIT_SECONDS.observe(job.started_at - job.submitted_at)
+            self._set_status(job, RUNNING)
+            try:
+                job.result = job.fn(*job.args)
+                status = DONE
+            except Exception as e:
+                logger.exception("render job %s failed", job.id)
+                metrics.ERRORS.inc(endpoint='render_job', type=type(e).__name__)
+                job.error = str(e)
+                status = FAILED
+            job.finished_at = time.monotonic()
+            self._mean_run = 0.8 * self._mean_run + 0.2 * (job.finished_at - job.started_at)
+            metrics.JOB_EVENTS.inc(event=status)
+            self._set_status(job, status)
+            job.fn = job.args = None  # the stats are only needed until the render is done
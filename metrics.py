@@ -0,0 +1,228 @@
+"""
+In-process request metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain thread-safe objects; `stage()`
+times a block into the stage histogram and, while a request is being
+tracked, into that request's list of timings for the Server-Timing header.
+
+Metrics recorded inside render worker processes stay in those processes;
+the parent records the per-figure wall time of pooled renders instead.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# seconds; the Prometheus client defaults, which span a Jinja render to a slow chart
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """A named family of values, one per combination of label values."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(name suffix, formatted labels, value) of every series"""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            yield '', _format_labels(self.labelnames, key), value
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples()]
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels) -> None:
+        """mirror a count that is kept elsewhere (e.g. by the render cache) at scrape time"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # per bucket counts (last one is +Inf), then the sum
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        for key, series in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                yield '_bucket', _format_labels(self.labelnames, key, f'le="{le}"'), cumulative
+            yield '_sum', _format_labels(self.labelnames, key), series[-1]
+            yield '_count', _format_labels(self.labelnames, key), cumulative
+
+
+class Registry:
+    """Metrics to expose, plus callbacks that refresh gauges/counters owned elsewhere at scrape time."""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        self._collectors.append(collect)
+
+    def expose(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._metrics:
+            lines += metric.expose()
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'hd2_request_duration_seconds', 'Request latency by endpoint and status.', ('endpoint', 'method', 'status')))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'hd2_requests_in_flight', 'Requests currently being handled.'))
+REQUESTS_IN_FLIGHT.set(0)
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'hd2_stage_duration_seconds', 'Time spent per pipeline stage (figure is empty for per-request stages).',
+    ('stage', 'figure')))
+FIGURES_RENDERED = REGISTRY.register(Counter(
+    'hd2_figures_rendered_total', 'Figures rendered, by figure and render backend.', ('figure', 'backend')))
+RENDER_CACHE_EVENTS = REGISTRY.register(Counter(
+    'hd2_render_cache_events_total', 'Render cache lookups and evictions (event is hit, miss or eviction).',
+    ('event',)))
+FIGURE_CACHE_EVENTS = REGISTRY.register(Counter(
+    'hd2_figure_cache_events_total', 'Per-figure cache lookups and evictions (event is hit, miss or eviction).',
+    ('event',)))
+FIGURE_CACHE_BYTES = REGISTRY.register(Gauge(
+    'hd2_figure_cache_bytes', 'Bytes held by the per-figure cache.'))
+RENDERS_COALESCED = REGISTRY.register(Counter(
+    'hd2_renders_coalesced_total', 'Requests that shared an identical render already in flight instead of rendering.'))
+RENDERS_COALESCED.set(0)
+RENDER_CACHE_BYTES = REGISTRY.register(Gauge(
+    'hd2_render_cache_bytes', 'Bytes held by the render cache.'))
+ERRORS = REGISTRY.register(Counter(
+    'hd2_errors_total', 'Exceptions turned into error pages or responses, by endpoint and type.',
+    ('endpoint', 'type')))
+JOB_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'hd2_job_queue_depth', 'Render jobs waiting for a job worker.'))
+JOB_QUEUE_DEPTH.set(0)
+JOB_WAIT_SECONDS = REGISTRY.register(Histogram(
+    'hd2_job_wait_seconds', 'Time render jobs spent queued before a job worker took them.'))
+JOB_EVENTS = REGISTRY.register(Counter(
+    'hd2_jobs_total', 'Render jobs by event (submitted, rejected when the queue was full, done, failed).',
+    ('event',)))
+
+# Server-Timing entries of the request being handled on this thread, None when not tracking
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def stage(name: str, figure: str = '') -> Iterator[None]:
+    """time a block into STAGE_SECONDS and the current request's Server-Timing entries"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name, figure=figure)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((f"{name}_{figure}" if figure else name, elapsed))
+
+
+def begin_request():
+    """start collecting stage timings for this thread's request; returns a token for end_request"""
+    return _request_timings.set([])
+
+
+def request_timings() -> List[Tuple[str, float]]:
+    """(stage, seconds) entries recorded so far for this thread's request"""
+    return list(_request_timings.get() or [])
+
+
+def end_request(token) -> None:
+    _request_timings.reset(token)
+
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Server-Timing header value, durations in milliseconds"""
+    return ', '.join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings)
@@ -0,0 +1,113 @@
+"""
+The result charts drawn straight from the metric dicts with plain matplotlib.
+
+Same figures as charts.FIGURES, without building a DataFrame per panel or
+going through seaborn: `categorical_bars` draws what sns.barplot draws for one
+value per category, so the PNGs match the seaborn backend pixel for pixel.
+Neither pandas nor seaborn is imported here.
+"""
+from typing import Callable, Dict
+
+from matplotlib.artist import setp
+from matplotlib.figure import Figure
+
+import metrics
+from analysis import EnemyKillStats, CombatStatsAnalysis
+from image_formats import ImageOptions
+from mpl_utils import add_value_labels, categorical_bars, fig_to_image, new_figure
+
+
+def create_kill_distribution_chart(stats_dict: dict, analysis: CombatStatsAnalysis) -> Figure:
+    """1. kill distribution chart: kills by enemy type as bars and a pie"""
+    fig = new_figure(figsize=(12, 8))
+    fig.suptitle("Enemy Kill Distribution Analysis", fontsize=16)
+
+    ax1 = fig.add_subplot(2, 1, 1)
+    kills_data = EnemyKillStats(
+        terminid_kills=stats_dict['terminid_kills'],
+        automaton_kills=stats_dict['automaton_kills'],
+        illuminate_kills=stats_dict['illuminate_kills'],
+        friendly_kills=stats_dict['friendly_kills']
+    ).to_dict()
+
+    if sum(kills_data.values()) > 0:  # only create chart if there are kills
+        categorical_bars(ax1, list(kills_data), list(kills_data.values()), 'Enemy Type', 'Kills')
+        ax1.set_title("Kills by Enemy Type")
+        setp(ax1.get_xticklabels(), rotation=45, ha='right')
+        add_value_labels(ax1, format_str='{:.0f}')
+
+        ax2 = fig.add_subplot(2, 1, 2)
+        present = [(k, v) for k, v in kills_data.items() if v > 0]
+        ax2.pie([v for _, v in present], labels=[k for k, _ in present], autopct='%1.1f%%')
+        ax2.set_title("Enemy Kills Distribution")
+
+    fig.tight_layout()
+    return fig
+
+
+def create_combat_performance_chart(stats_dict: dict, analysis: CombatStatsAnalysis) -> Figure:
+    """2. main analysis chart: efficiency, combat style and stratagem usage"""
+    fig = new_figure(figsize=(14, 12))
+    axs = fig.subplots(3, 1)
+    fig.suptitle("Combat Performance Analysis", fontsize=16)
+
+    panels = [
+        (analysis.efficiency_metrics, 'Metric', 'Value', 'Performance Metrics per Mission', '{:.2f}'),
+        (analysis.combat_style, 'Style', 'Kills', 'Combat Style Distribution', '{:,.0f}'),
+        (analysis.stratagem_efficiency, 'Stratagem', 'Usage per Mission', 'Stratagem Usage per Mission', '{:.2f}'),
+    ]
+    for ax, (values, x, y, title, format_str) in zip(axs, panels):
+        categorical_bars(ax, list(values), list(values.values()), x, y)
+        ax.set_title(title)
+        ax.tick_params(axis='x', rotation=45)
+        add_value_labels(ax, format_str)
+
+    fig.tight_layout(rect=[0, 0, 1, 0.97])
+    return fig
+
+
+def create_rewards_chart(stats_dict: dict, analysis: CombatStatsAnalysis) -> Figure:
+    """3. rewards and success metrics"""
+    fig = new_figure(figsize=(14, 6))
+    ax1, ax2 = fig.subplots(1, 2)
+    fig.suptitle("Rewards and Mission Success Metrics", fontsize=16)
+
+    labels = ['Samples per Mission', 'XP per Mission (÷100)']
+    values = [analysis.samples_per_mission, analysis.xp_per_mission / 100]
+    categorical_bars(ax1, labels, values, 'Metric', 'Value')
+    ax1.set_title('Reward Metrics per Mission')
+
+    offset = max(values) * 0.01
+    for i, v in enumerate(values):
+        # the XP bar is scaled down by 100, its label shows the real value
+        ax1.text(i, v + offset, f"{v*100:.1f}" if i == 1 else f"{v:.1f}", ha='center')
+
+    if stats_dict['missions_played'] > 0:
+        missions_won = stats_dict['missions_won']
+        ax2.pie([missions_won, stats_dict['missions_played'] - missions_won],
+                labels=['Successful Missions', 'Failed Missions'], autopct='%1.1f%%',
+                colors=['#4CAF50', '#F44336'])
+        ax2.set_title('Mission Success Rate')
+
+    fig.tight_layout(rect=[0, 0, 1, 0.95])
+    return fig
+
+
+# same names and order as charts.FIGURES
+FIGURES: Dict[str, Callable[[dict, CombatStatsAnalysis], Figure]] = {
+    'kill_distribution': create_kill_distribution_chart,
+    'combat_performance': create_combat_performance_chart,
+    'rewards': create_rewards_chart,
+}
+
+
+def render_figure(name: str, stats_dict: dict, analysis: CombatStatsAnalysis = None,
+                  image: ImageOptions = ImageOptions()) -> bytes:
+    """build one named figure and return it as image bytes (PNG by default)"""
+    if analysis is None:
+        analysis = CombatStatsAnalysis(stats_dict)
+
+    with metrics.stage('build', name):
+        fig = FIGURES[name](stats_dict, analysis)
+    with metrics.stage('encode', name):
+        return fig_to_image(fig, image)
@@ -0,0 +1,184 @@
+"""
+Percentile ranks of a player's efficiency metrics within a population.
+
+The index keeps every metric of the population as sorted NumPy runs, so a rank
+is a binary search per run. New rows are added as a sorted run of their own and
+runs are merged the way a binary counter carries, so there are at most
+log2(n) runs and the population is never fully re-sorted on ingest.
+
+Rows can be keyed by player: a player added again has their earlier values
+added to a second set of runs that ranks subtract, so a newer snapshot replaces
+the older one instead of counting the player twice. Those runs are subtracted
+out once they grow to half the population.
+
+    index = PercentileIndex.from_csv('26Feb2025.csv')
+    index.percentiles({"Kills per mission": 41.2, "Accuracy(%)": 52.0})
+"""
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from analysis import EFFICIENCY_METRICS, TIME_FIELD, TIME_METRICS, compute_metrics
+from batch import DEFAULT_CHUNK_ROWS, read_stat_chunks
+from player_stats import array_columns, from_columns, has_time_column
+
+# display label -> metrics column of every ranked metric
+RANKED_METRICS = {**EFFICIENCY_METRICS, **TIME_METRICS}
+
+# metrics where a smaller value is the better result
+LOWER_IS_BETTER = {'deaths_per_mission'}
+
+
+class PercentileIndex:
+    """
+    Sorted values per metric over a population of players.
+
+    Players without missions are left out (their per-mission metrics are all 0),
+    as are players without mission time for the per-hour metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # column -> (sorted runs, sorted runs of replaced values), largest first;
+        # replaced, never mutated, so readers need no lock
+        self._runs: Dict[str, tuple] = {column: ((), ()) for column in RANKED_METRICS.values()}
+        # player -> column -> value, for the rows added with a player name
+        self._players: Dict[str, Dict[str, float]] = {}
+        # player -> hash of the snapshot row last added by add_snapshots
+        self._snapshots: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.size('kills_per_mission')
+
+    def size(self, column: str) -> int:
+        runs, replaced = self._runs[column]
+        return _count(runs) - _count(replaced)
+
+    def add(self, columns: Mapping[str, np.ndarray], players: Sequence[str] = None) -> int:
+        """
+        Add players to the population.
+
+        Args:
+            columns: stat columns as returned by player_stats.array_columns
+            players: name of each row, at most once per call; a player already
+                added by name has their earlier values replaced
+        Returns:
+            number of players added
+        """
+        metrics = compute_metrics(columns)
+        played = np.asarray(columns['missions_played']) > 0
+        timed = played & (metrics['mission_hours'] > 0) if TIME_FIELD in columns else None
+        keeps = {column: timed if column in TIME_METRICS.values() else played
+                 for column in RANKED_METRICS.values() if column in metrics}
+
+        with self._lock:
+            replaced = {column: [] for column in RANKED_METRICS.values()}
+            for row, player in enumerate(players or ()):
+                for column, value in self._players.pop(player, {}).items():
+                    replaced[column].append(value)
+                self._players[player] = {column: float(metrics[column][row])
+                                         for column, keep in keeps.items() if keep[row]}
+
+            for column in RANKED_METRICS.values():
+                runs, removed = self._runs[column]
+                if column in keeps:
+                    values = np.sort(metrics[column][keeps[column]])
+                    if len(values):
+                        runs = self._merge(list(runs) + [values])
+                if replaced[column]:
+                    removed = self._merge(list(removed) + [np.sort(np.array(replaced[column]))])
+                    if _count(removed) * 2 >= _count(runs):
+                        left = _subtract(runs, removed)
+                        runs, removed = ((left,) if len(left) else ()), ()
+                self._runs[column] = (runs, removed)
+        return int(played.sum())
+
+    @staticmethod
+    def _merge(runs: List[np.ndarray]) -> tuple:
+        # carry: merge the newest run into the one before while it is at least half as big
+        while len(runs) > 1 and len(runs[-1]) * 2 >= len(runs[-2]):
+            newest = runs.pop()
+            # stable sort finds the two presorted runs and merges them in linear time
+            runs[-1] = np.sort(np.concatenate([runs[-1], newest]), kind='stable')
+        return tuple(runs)
+
+    def add_csv(self, source, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+        """add every row of a career stats CSV (path or file-like object)"""
+        added = 0
+        for chunk in read_stat_chunks(source, chunk_rows):
+            added += self.add(array_columns(from_columns(chunk), with_time=has_time_column(chunk)))
+        return added
+
+    @classmethod
+    def from_csv(cls, source, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> 'PercentileIndex':
+        index = cls()
+        index.add_csv(source, chunk_rows)
+        return index
+
+    def add_snapshots(self, rows: List[dict]) -> int:
+        """
+        Add snapshot rows as returned by snapshots.SnapshotStore.latest, one per
+        player, replacing the player's earlier snapshot. Rows unchanged since the
+        last call are skipped, so passing every latest row again after an ingest
+        only re-ranks the players it changed.
+        """
+        with self._lock:
+            changed = [row for row in rows
+                       if self._snapshots.get(row['player']) != hash(tuple(row.values()))]
+            if not changed:
+                return 0
+            added = self.add({field: np.array([row[field] for row in changed], dtype=np.int64)
+                              for field in changed[0] if field not in ('player', 'snapshot_date')},
+                             players=[row['player'] for row in changed])
+            self._snapshots.update((row['player'], hash(tuple(row.values()))) for row in changed)
+            return added
+
+    @classmethod
+    def from_snapshots(cls, store) -> 'PercentileIndex':
+        """population of the latest snapshot of every player in a snapshots.SnapshotStore"""
+        index = cls()
+        index.add_snapshots(store.latest())
+        return index
+
+    def rank(self, column: str, value: float) -> Optional[float]:
+        """
+        Percentage of the population this value beats (ties count half),
+        or None when nobody in the population has this metric.
+        """
+        runs, replaced = self._runs[column]
+        total = _count(runs) - _count(replaced)
+        if not total:
+            return None
+        below = _count_below(runs, value, 'left') - _count_below(replaced, value, 'left')
+        equal = _count_below(runs, value, 'right') - _count_below(replaced, value, 'right') - below
+        if column in LOWER_IS_BETTER:
+            below = total - below - equal
+        return (below + equal / 2) / total * 100
+
+    def percentiles(self, values: Mapping[str, float]) -> Dict[str, float]:
+        """percentile per display label for the labels of RANKED_METRICS in `values`"""
+        ranks = {}
+        for label, value in values.items():
+            column = RANKED_METRICS.get(label)
+            if column is not None:
+                rank = self.rank(column, value)
+                if rank is not None:
+                    ranks[label] = rank
+        return ranks
+
+
+def _count(runs: tuple) -> int:
+    return sum(len(run) for run in runs)
+
+
+def _count_below(runs: tuple, value: float, side: str) -> int:
+    return sum(int(np.searchsorted(run, value, side=side)) for run in runs)
+
+
+def _subtract(runs: tuple, replaced: tuple) -> np.ndarray:
+    """one sorted run of the values in `runs` less one occurrence of each value in `replaced`"""
+    values, counts = np.unique(np.concatenate(runs), return_counts=True)
+    gone, gone_counts = np.unique(np.concatenate(replaced), return_counts=True)
+    counts[np.searchsorted(values, gone)] -= gone_counts
+    return np.repeat(values, counts)
@@ -0,0 +1,237 @@
+"""
+One schema for a player's career stats, whatever shape they arrive in.
+
+The /analyze form and the JSON API use snake_case field names, the career
+export (26Feb2025.csv) its Title Case headers. SCHEMA lists every field once
+with its header, and FIELD_KEYS, built from it at import, maps either name to
+the field, so parsing a row is one dict lookup per key it actually has.
+
+A single player is a PlayerStats (a slotted dataclass, no per-instance dict); many
+players are one NumPy structured array of STATS_DTYPE, 8 bytes per field and
+row. Column views of that array (array_columns) are what compute_metrics
+takes, without copying.
+"""
+import operator
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, Iterator, List, Mapping
+
+import numpy as np
+
+from durations import parse_duration, parse_durations
+
+# (field, export header), the metric fields in the order they appear in the form
+SCHEMA = [
+    ('missions_played', 'Missions Played'),
+    ('missions_won', 'Mission Won'),
+    ('successful_extractions', 'Successful Extractions'),
+    ('objectives_completed', 'Obj Completed'),
+    ('terminid_kills', 'Terminid Kills'),
+    ('automaton_kills', 'Automaton Kills'),
+    ('illuminate_kills', 'Illuminate Kills'),
+    ('friendly_kills', 'Friendly Kills'),
+    ('grenade_kills', 'Grenade Kills'),
+    ('melee_kills', 'Melee Kills'),
+    ('eagle_kills', 'Eagle Kills'),
+    ('shots_fired', 'Shots Fired'),
+    ('shots_hit', 'Shots Hit'),
+    ('deaths', 'Deaths'),
+    ('samples_collected', 'Samples Collected'),
+    ('total_xp', 'Total XP Earned'),
+    ('total_stratagems', 'Total Strats Used'),
+    ('orbitals_used', 'Orbitals Used'),
+    ('defensive_stratagems', 'Defensive Stratagems Used'),
+    ('eagles_used', 'Eagles Used'),
+    # exported and carried along, but no metric uses them
+    ('supply_stratagems', 'Supply Stratagems Used'),
+    ('reinforcements', 'Reinforce Used'),
+    # optional total in-mission time, in seconds; exports store it as HHH:MM:SS
+    ('mission_seconds', 'In Mission Time'),
+]
+
+EXTRA_FIELDS = ['supply_stratagems', 'reinforcements']
+TIME_FIELD, TIME_CSV_COLUMN = SCHEMA[-1]
+# the counters every metric is computed from
+STAT_FIELDS = [field for field, _ in SCHEMA[:-1] if field not in EXTRA_FIELDS]
+COUNT_FIELDS = STAT_FIELDS + EXTRA_FIELDS
+FIELDS = COUNT_FIELDS + [TIME_FIELD]
+CSV_COLUMNS = {field: header for field, header in SCHEMA if field != TIME_FIELD}
+
+# field name, export header or form alias -> field
+FIELD_KEYS: Dict[str, str] = {}
+for _field, _header in SCHEMA:
+    FIELD_KEYS[_field] = FIELD_KEYS[_header] = _field
+FIELD_KEYS['mission_time'] = TIME_FIELD  # the form's free-text duration input
+# the same keys -> position in FIELDS, what the row parser looks up
+FIELD_INDEX = {key: FIELDS.index(field) for key, field in FIELD_KEYS.items()}
+TIME_INDEX = FIELDS.index(TIME_FIELD)
+
+# mission_seconds of a player whose time was not recorded (the per-hour metrics are left out)
+NO_TIME = -1
+
+STATS_DTYPE = np.dtype([(field, np.int64) for field in FIELDS])
+_DEFAULTS = [0] * len(COUNT_FIELDS) + [NO_TIME]
+_values = operator.attrgetter(*FIELDS)
+
+
+# counters and times are stored as int64 (STATS_DTYPE, compute_metrics)
+INT64_MIN, INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+
+def _int64(value: int) -> int:
+    if not INT64_MIN <= value <= INT64_MAX:
+        raise ValueError(f"{value} is out of range for a stat (at most {INT64_MAX})")
+    return value
+
+
+def _count(value) -> int:
+    """a counter cell: int, numeric string, or empty / None / NaN for 0; ValueError past int64"""
+    if isinstance(value, str):
+        value = value.strip()
+        return _int64(int(value)) if value else 0
+    if value is None or value != value:
+        return 0
+    try:
+        return _int64(int(value))
+    except OverflowError:  # float infinity
+        raise ValueError(f"{value} is out of range for a stat (at most {INT64_MAX})") from None
+
+
+@dataclass(slots=True)
+class PlayerStats:
+    """One player's counters plus the optional mission time, fields in FIELDS order."""
+
+    missions_played: int = 0
+    missions_won: int = 0
+    successful_extractions: int = 0
+    objectives_completed: int = 0
+    terminid_kills: int = 0
+    automaton_kills: int = 0
+    illuminate_kills: int = 0
+    friendly_kills: int = 0
+    grenade_kills: int = 0
+    melee_kills: int = 0
+    eagle_kills: int = 0
+    shots_fired: int = 0
+    shots_hit: int = 0
+    deaths: int = 0
+    samples_collected: int = 0
+    total_xp: int = 0
+    total_stratagems: int = 0
+    orbitals_used: int = 0
+    defensive_stratagems: int = 0
+    eagles_used: int = 0
+    supply_stratagems: int = 0
+    reinforcements: int = 0
+    mission_seconds: int = NO_TIME
+
+    @classmethod
+    def from_mapping(cls, data: Mapping) -> 'PlayerStats':
+        """
+        Parse form fields, a JSON object or a CSV row, in either naming.
+
+        Unknown keys are ignored. The mission time may be seconds or a
+        duration string ("931:20:00", "38d 19h 20m 0s"); blank, None or NaN
+        means not recorded.
+        """
+        values = list(_DEFAULTS)
+        for key, value in data.items():
+            index = FIELD_INDEX.get(key)
+            if index is None:
+                # padded headers (" Deaths") are rare, only strip on a miss
+                if not isinstance(key, str) or key.strip() not in FIELD_INDEX:
+                    continue
+                index = FIELD_INDEX[key.strip()]
+            if index == TIME_INDEX:
+                # blank, null and NaN all mean not recorded, as in from_columns
+                if not (value is None or value != value or (isinstance(value, str) and not value.strip())):
+                    values[index] = _int64(parse_duration(value))
+            else:
+                values[index] = value if type(value) is int and INT64_MIN <= value <= INT64_MAX else _count(value)
+        return cls(*values)
+
+    @property
+    def has_time(self) -> bool:
+        return self.mission_seconds != NO_TIME
+
+    def to_dict(self) -> Dict[str, int]:
+        """the stats dict used across the app: every counter, plus TIME_FIELD only when recorded"""
+        stats = {field: getattr(self, field) for field in COUNT_FIELDS}
+        if self.has_time:
+            stats[TIME_FIELD] = self.mission_seconds
+        return stats
+
+    def to_row(self) -> Dict[str, int]:
+        """keyed by export header, time in seconds (NO_TIME when not recorded)"""
+        row = {CSV_COLUMNS[field]: getattr(self, field) for field in COUNT_FIELDS}
+        row[TIME_CSV_COLUMN] = self.mission_seconds
+        return row
+
+    def to_tuple(self) -> tuple:
+        """values in FIELDS order, i.e. one STATS_DTYPE record"""
+        return _values(self)
+
+    @classmethod
+    def from_record(cls, record) -> 'PlayerStats':
+        """from one element of a STATS_DTYPE array"""
+        return cls(*record.tolist())
+
+
+assert [f.name for f in fields(PlayerStats)] == FIELDS, "PlayerStats fields out of step with SCHEMA"
+
+
+def to_array(players: Iterable[PlayerStats]) -> np.ndarray:
+    """many PlayerStats as one STATS_DTYPE array"""
+    return np.array([player.to_tuple() for player in players], dtype=STATS_DTYPE)
+
+
+def from_array(array: np.ndarray) -> Iterator[PlayerStats]:
+    """the rows of a STATS_DTYPE array as PlayerStats, one at a time"""
+    for record in array:
+        yield PlayerStats.from_record(record)
+
+
+def has_time_column(data) -> bool:
+    return TIME_FIELD in data or TIME_CSV_COLUMN in data
+
+
+def from_columns(data) -> np.ndarray:
+    """
+    Copy a DataFrame (or a mapping of columns) into one STATS_DTYPE array.
+
+    Columns may use the field names or the export headers. Every STAT_FIELDS
+    column is required (KeyError otherwise); missing extra columns count as 0
+    and a missing time column as NO_TIME. Empty cells count as 0, empty time
+    cells as NO_TIME.
+    """
+    columns = {}
+    for key in data:
+        field = FIELD_KEYS.get(key.strip() if isinstance(key, str) else key)
+        if field is not None and field not in columns:
+            columns[field] = data[key]
+    for field in STAT_FIELDS:
+        if field not in columns:
+            raise KeyError(f"missing column {field!r} / {CSV_COLUMNS[field]!r}")
+
+    rows = len(columns[STAT_FIELDS[0]])
+    array = np.zeros(rows, dtype=STATS_DTYPE)
+    for field in COUNT_FIELDS:
+        if field in columns:
+            values = np.asarray(columns[field])
+            if values.dtype.kind == 'f':
+                values = np.nan_to_num(values)
+            try:
+                array[field] = values
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"column {CSV_COLUMNS[field]!r}: {e}") from None
+    array[TIME_FIELD] = parse_durations(columns[TIME_FIELD], missing=NO_TIME) if TIME_FIELD in columns else NO_TIME
+    return array
+
+
+def array_columns(array: np.ndarray, with_time: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Field -> column view of a STATS_DTYPE array, no copy; the input compute_metrics takes.
+
+    with_time=False leaves TIME_FIELD out, so no per-hour metrics are computed.
+    """
+    fields: List[str] = FIELDS if with_time else COUNT_FIELDS
+    return {field: array[field] for field in fields}
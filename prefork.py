@@ -0,0 +1,267 @@
+"""
+Pre-fork process supervisor for serving the app from several processes.
+
+Rendering holds the GIL, so more waitress threads in one process do not
+render more charts per second. The Supervisor binds the listening socket once,
+runs the preload (imports, fonts, a warm-up render) so every worker shares
+those pages copy-on-write, then forks `processes` workers that each run
+waitress on the inherited socket. The kernel hands every new connection to
+one of them.
+
+Workers that exit are replaced, with a growing delay if they keep dying right
+after start. A worker whose RSS grows past the limit gets a replacement first
+and is then told to stop: it stops accepting, finishes the requests it has,
+and exits.
+
+POSIX only (os.fork).
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from waitress import wasyncore
+from waitress.channel import HTTPChannel
+from waitress.server import create_server
+from waitress.task import WSGITask
+
+logger = logging.getLogger(__name__)
+
+# how often the supervisor reaps exited workers and checks their memory
+CHECK_SECONDS = 1.0
+# a worker that dies sooner than this after its start counts towards the crash-loop backoff
+MIN_UPTIME_SECONDS = 5.0
+MAX_BACKOFF_SECONDS = 30.0
+# a stopping worker keeps its open connections at least this long before closing idle ones
+DRAIN_GRACE_SECONDS = 1.0
+
+
+def listen_socket(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    """the TCP socket the workers share; bound and listening before the first fork"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """resident bytes of one process (Linux /proc); None when it cannot be read"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _busy(channel) -> bool:
+    # an HTTP channel with a request being read or served, or a response still being sent
+    return bool(getattr(channel, 'request', None) or getattr(channel, 'requests', None)
+                or getattr(channel, 'total_outbufs_len', 0))
+
+
+class _StoppingTask(WSGITask):
+    # once the worker is stopping, answer with "Connection: close" so keep-alive
+    # clients reconnect (to another worker) instead of reusing a closing socket
+    def build_response_header(self):
+        if getattr(self.channel.server, 'stopping', False):
+            self.request.headers['CONNECTION'] = 'close'
+        return super().build_response_header()
+
+
+class _WorkerChannel(HTTPChannel):
+    task_class = _StoppingTask
+
+
+def serve_worker(app, sock: socket.socket, threads: int = 4, drain_seconds: float = 30.0) -> None:
+    """
+    Run waitress on an inherited listening socket until SIGTERM.
+
+    On SIGTERM the worker stops accepting connections (the other workers keep
+    accepting on the same socket), lets the requests it already has finish for
+    up to drain_seconds, then closes.
+    """
+    socket_map: dict = {}
+    server = create_server(app, map=socket_map, sockets=[sock], threads=threads)
+    server.channel_class = _WorkerChannel
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        stopping.set()  # seen by the loop below within one poll timeout
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the supervisor, which stops us
+    logger.info("worker %d serving on http://%s:%s", os.getpid(), *sock.getsockname()[:2])
+
+    timeout = server.adj.asyncore_loop_timeout
+    while not stopping.is_set():
+        wasyncore.loop(timeout=timeout, map=socket_map, count=1)
+
+    server.stopping = True
+    server.accepting = False
+    now = time.monotonic()
+    deadline = now + drain_seconds
+    # connections accepted just before the signal may not have sent their request yet
+    grace = now + min(DRAIN_GRACE_SECONDS, drain_seconds)
+    while time.monotonic() < deadline:
+        if time.monotonic() >= grace and not any(_busy(channel) for channel in list(socket_map.values())):
+            break
+        wasyncore.loop(timeout=0.1, map=socket_map, count=1)
+    server.task_dispatcher.shutdown()
+    wasyncore.close_all(socket_map)
+
+
+class Supervisor:
+    """
+    Forks and supervises `processes` workers serving one listening socket.
+
+    Args:
+        serve: run in each worker with the shared socket, returns when the worker should exit
+        preload: run once in the supervisor before the first fork
+        max_rss_bytes: recycle a worker whose RSS exceeds this (0: never)
+        drain_seconds: how long a stopping worker may take to finish its requests
+    """
+
+    def __init__(self, serve: Callable[[socket.socket], None], host: str, port: int, processes: int,
+                 preload: Callable[[], None] = None, max_rss_bytes: int = 0, drain_seconds: float = 30.0):
+        self.serve = serve
+        self.host = host
+        self.port = port
+        self.processes = processes
+        self.preload = preload
+        self.max_rss_bytes = max_rss_bytes
+        self.drain_seconds = drain_seconds
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.retiring: Dict[int, float] = {}  # pid -> when it was asked to stop
+        self.restarts = 0
+        self._crashes = 0
+        self._next_spawn = 0.0
+        self._stopping = False
+
+    def _spawn(self, sock: socket.socket) -> None:
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                self.serve(sock)
+            except BaseException:
+                logger.exception("worker %d failed", os.getpid())
+                status = 1
+            finally:
+                # never fall back into the supervisor's code in the child
+                os._exit(status)
+        self.workers[pid] = time.monotonic()
+        logger.info("started worker %d (%d/%d)", pid, len(self.workers), self.processes)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.retiring.clear()  # no children left at all
+                return
+            if pid == 0:
+                return
+            if self.retiring.pop(pid, None) is not None:
+                logger.info("worker %d stopped", pid)
+                continue
+            started = self.workers.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            # died on its own: replace it, backing off while workers keep dying at start
+            self.restarts += 1
+            if time.monotonic() - started < MIN_UPTIME_SECONDS:
+                self._crashes += 1
+                delay = min(2 ** self._crashes, MAX_BACKOFF_SECONDS)
+                self._next_spawn = time.monotonic() + delay
+                logger.error("worker %d exited right after start (%s), next start in %.0fs",
+                             pid, self._describe(status), delay)
+            else:
+                self._crashes = 0
+                logger.error("worker %d exited (%s), replacing it", pid, self._describe(status))
+
+    @staticmethod
+    def _describe(status: int) -> str:
+        if os.WIFSIGNALED(status):
+            return f"signal {os.WTERMSIG(status)}"
+        return f"status {os.WEXITSTATUS(status)}"
+
+    def _check_memory(self, sock: socket.socket) -> None:
+        if not self.max_rss_bytes:
+            return
+        for pid, started in list(self.workers.items()):
+            if time.monotonic() - started < MIN_UPTIME_SECONDS:
+                continue  # still loading; also keeps a too-low limit from recycling in a tight loop
+            rss = process_rss(pid)
+            if rss is None or rss <= self.max_rss_bytes:
+                continue
+            logger.warning("worker %d uses %.0f MiB, over the %.0f MiB limit, recycling it",
+                           pid, rss / 2 ** 20, self.max_rss_bytes / 2 ** 20)
+            # the replacement starts first, so capacity does not drop while the old one drains
+            del self.workers[pid]
+            self.restarts += 1
+            self._spawn(sock)
+            self._retire(pid)
+
+    def _retire(self, pid: int) -> None:
+        self.retiring[pid] = time.monotonic()
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _kill_stuck(self) -> None:
+        """SIGKILL stopping workers that outlived their drain time"""
+        limit = self.drain_seconds + 5
+        for pid, since in list(self.retiring.items()):
+            if time.monotonic() - since > limit:
+                logger.warning("worker %d did not stop within %.0fs, killing it", pid, limit)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        sock = listen_socket(self.host, self.port)
+        logger.info("supervisor %d listening on http://%s:%s with %d workers",
+                    os.getpid(), self.host, self.port, self.processes)
+        if self.preload is not None:
+            start = time.perf_counter()
+            self.preload()
+            logger.info("preloaded in %.1fs", time.perf_counter() - start)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        try:
+            while not self._stopping:
+                self._reap()
+                while len(self.workers) < self.processes and time.monotonic() >= self._next_spawn:
+                    self._spawn(sock)
+                self._check_memory(sock)
+                self._kill_stuck()
+                time.sleep(CHECK_SECONDS)
+        finally:
+            self._stop_all()
+            sock.close()
+
+    def _stop_all(self) -> None:
+        """ask every worker to drain and exit; kill the ones still there after the drain time"""
+        for pid in list(self.workers):
+            self._retire(pid)
+        self.workers.clear()
+        while self.retiring:
+            self._reap()
+            self._kill_stuck()
+            time.sleep(0.1)
+        logger.info("all workers stopped (%d restarts)", self.restarts)
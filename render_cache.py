@@ -0,0 +1,238 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# rough per-entry bookkeeping cost on top of the png bytes (dict, keys, floats)
+ENTRY_OVERHEAD = 2048
+FIGURE_ENTRY_OVERHEAD = 256
+
+
+def stats_key(stats_dict: dict, namespace: str = '') -> str:
+    """
+    Canonical content hash of a normalized stats dict.
+
+    Args:
+        stats_dict: stats with plain int/float/str values
+        namespace: extra salt (render version, output format, ...)
+    Returns:
+        hex digest that is stable across processes and key order
+    """
+    payload = json.dumps(stats_dict, sort_keys=True, separators=(',', ':'))
+    digest = hashlib.sha256(f"{namespace}|{payload}".encode())
+    return digest.hexdigest()[:32]
+
+
+@dataclass
+class CachedRender:
+    images: List[bytes]
+    summary_stats: dict
+    # image_formats.IMAGE_FORMATS key the images are encoded in
+    format: str = 'png'
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(img) for img in self.images) + ENTRY_OVERHEAD
+
+
+@dataclass
+class CachedFigure:
+    """one figure's image, cached under a key of only the fields it is drawn from"""
+    image: bytes
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.image) + FIGURE_ENTRY_OVERHEAD
+
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered results (anything with `nbytes`) bounded by a byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, CachedRender]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str, record: bool = True) -> Optional[CachedRender]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key: key from stats_key
+            record: count the lookup in the hit/miss counters
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if record:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if record:
+                self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedRender) -> bool:
+        """store an entry, evicting least recently used ones to fit the budget"""
+        size = entry.nbytes
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.nbytes
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += 1
+
+            self._entries[key] = entry
+            self.current_bytes += size
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class _Call:
+    """one in-flight call of a SingleFlight"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        # ended without a result or error (a streamed response closed early); waiters retry
+        self.abandoned = False
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function, callers arriving while it runs wait and get the same result
+    (or the same exception). Nothing is kept once the call returns, that is
+    the render cache's job.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Returns:
+            (result, shared): shared is True when another caller's run was reused
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+            if leader:
+                break
+            call.done.wait()
+            if call.abandoned:
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._end(key, call)
+        return call.result, False
+
+    def claim(self, key: str) -> Optional['Flight']:
+        """
+        Lead a call for key that the caller completes later through the returned
+        Flight, e.g. over a streamed response; do() callers wait for it as for any
+        other call. None when a call for key is already running.
+        """
+        with self._lock:
+            if key in self._calls:
+                return None
+            call = self._calls[key] = _Call()
+        return Flight(self, key, call)
+
+    def _end(self, key: str, call: _Call) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    def __contains__(self, key: str) -> bool:
+        """a call for key is running right now"""
+        with self._lock:
+            return key in self._calls
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class Flight:
+    """A SingleFlight call led by SingleFlight.claim, ended by exactly one of its methods (later ones do nothing)."""
+
+    def __init__(self, flight: SingleFlight, key: str, call: _Call):
+        self._flight = flight
+        self._key = key
+        self._call = call
+
+    @property
+    def ended(self) -> bool:
+        return self._call.done.is_set()
+
+    def finish(self, result) -> None:
+        """hand result to the waiting callers"""
+        if not self.ended:
+            self._call.result = result
+            self._flight._end(self._key, self._call)
+
+    def fail(self, error: BaseException) -> None:
+        """raise error in the waiting callers"""
+        if not self.ended:
+            self._call.error = error
+            self._flight._end(self._key, self._call)
+
+    def abandon(self) -> None:
+        """end without a result; waiting callers run the call themselves"""
+        if not self.ended:
+            self._call.abandoned = True
+            self._flight._end(self._key, self._call)
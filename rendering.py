@@ -0,0 +1,181 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import metrics
+from analysis import CombatStatsAnalysis
+from image_formats import ImageOptions
+
+logger = logging.getLogger(__name__)
+
+# small stat block used to warm fonts, seaborn and the Agg canvas in each worker; also
+# what figure_templates builds its templates from, so every value must stay positive
+WARMUP_STATS = {
+    'missions_played': 10, 'missions_won': 9, 'successful_extractions': 8, 'objectives_completed': 30,
+    'terminid_kills': 500, 'automaton_kills': 400, 'illuminate_kills': 100, 'friendly_kills': 2,
+    'grenade_kills': 40, 'melee_kills': 5, 'eagle_kills': 120,
+    'shots_fired': 9000, 'shots_hit': 4500, 'deaths': 20, 'samples_collected': 150, 'total_xp': 12000,
+    'total_stratagems': 200, 'orbitals_used': 30, 'defensive_stratagems': 40, 'eagles_used': 60,
+}
+
+
+# 'seaborn' builds every figure from scratch through seaborn, 'matplotlib' builds the
+# same figures with plain matplotlib (no pandas/seaborn import), 'template' updates
+# pooled pre-built figures
+BACKENDS = ('seaborn', 'matplotlib', 'template')
+
+
+# bump when chart output changes so stale cached renders and written reports are not reused
+RENDER_VERSION = '1'
+
+
+# stat fields each figure is drawn from, in page order: a figure only changes when one of
+# its inputs does, so it can be cached under a key of just these fields.
+# benchmarks/check_figure_inputs.py verifies that no other field affects a figure
+FIGURE_INPUTS: Dict[str, Tuple[str, ...]] = {
+    'kill_distribution': ('terminid_kills', 'automaton_kills', 'illuminate_kills', 'friendly_kills'),
+    'combat_performance': (
+        'missions_played', 'objectives_completed', 'terminid_kills', 'automaton_kills', 'illuminate_kills',
+        'grenade_kills', 'melee_kills', 'eagle_kills', 'shots_fired', 'shots_hit', 'deaths',
+        'samples_collected', 'total_xp', 'total_stratagems', 'orbitals_used', 'defensive_stratagems',
+        'eagles_used',
+    ),
+    'rewards': ('missions_played', 'missions_won', 'samples_collected', 'total_xp'),
+}
+
+
+def figure_inputs(name: str, stats_dict: dict) -> dict:
+    """the part of a stats dict that figure `name` depends on"""
+    return {field: stats_dict.get(field, 0) for field in FIGURE_INPUTS[name]}
+
+
+def render_namespace(backend: str, image: ImageOptions) -> str:
+    """salt of the render keys: the same stats give other images per version, backend and format"""
+    return f"{RENDER_VERSION}:{backend}:{image.tag}"
+
+
+def chart_module(backend: str):
+    """the module whose FIGURES/render_figure build charts for this backend from scratch"""
+    # imported by the first render, not at startup
+    if backend == 'seaborn':
+        import charts
+        return charts
+    import mpl_charts
+    return mpl_charts
+
+
+def render_figure(name: str, stats_dict: dict, analysis: CombatStatsAnalysis = None,
+                  backend: str = 'seaborn', image: ImageOptions = ImageOptions()) -> bytes:
+    """render one named figure with the given backend and return the image bytes"""
+    if backend == 'template':
+        import figure_templates
+        return figure_templates.TEMPLATE_POOL.render(name, stats_dict, analysis, image)
+    return chart_module(backend).render_figure(name, stats_dict, analysis, image)
+
+
+def warm_worker(backend: str) -> None:
+    """process pool initializer: pay the matplotlib/seaborn startup cost once per worker"""
+    for name in chart_module(backend).FIGURES:
+        render_figure(name, WARMUP_STATS, backend=backend)
+
+
+class RenderEngine:
+    """
+    Renders the result figures either in-process or on a warm process pool.
+
+    With workers > 0 every figure is submitted as its own task, so a request
+    takes roughly as long as its slowest figure instead of the sum of all three.
+    """
+
+    def __init__(self, workers: int = 0, backend: str = 'seaborn', start_method: str = 'spawn'):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown render backend {backend!r}, expected one of {BACKENDS}")
+        self.workers = workers
+        self.backend = backend
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 0
+
+    def start(self) -> None:
+        """create the pool now instead of on the first request"""
+        if self.parallel:
+            self._get_pool()
+
+    def warm_up(self) -> None:
+        """
+        Render the warm-up stats once, so imports, the font cache and seaborn's
+        style setup (and the pool workers, if any) are paid for before the first request.
+        """
+        self.render(WARMUP_STATS)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=warm_worker,
+                    initargs=(self.backend,),
+                )
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, stats_dict: dict, analysis: CombatStatsAnalysis = None,
+               image: ImageOptions = ImageOptions(), names: Sequence[str] = None) -> List[bytes]:
+        """render the named figures (default: all, in page order) and return the image bytes in order"""
+        return list(self.render_iter(stats_dict, analysis, image, names))
+
+    def render_iter(self, stats_dict: dict, analysis: CombatStatsAnalysis = None,
+                    image: ImageOptions = ImageOptions(), names: Sequence[str] = None) -> Iterator[bytes]:
+        """like render, but yields each image, in order, as soon as it is done"""
+        if names is None:
+            names = list(FIGURE_INPUTS)
+        if not self.parallel:
+            yield from self._render_local(stats_dict, analysis, image, names)
+            return
+
+        pool = self._get_pool()
+        done = 0
+        try:
+            futures = [pool.submit(render_figure, name, stats_dict, None, self.backend, image)
+                       for name in names]
+            # stage timings of the workers stay in the workers, record the wall time per figure here
+            for name, future in zip(names, futures):
+                with metrics.stage('pool_wait', name):
+                    img = future.result()
+                metrics.FIGURES_RENDERED.inc(figure=name, backend=self.backend)
+                done += 1
+                yield img
+        except BrokenProcessPool:
+            # a worker died (oom, segfault); draw the rest in-process and rebuild the pool
+            logger.exception("render pool broke, falling back to in-process rendering")
+            metrics.ERRORS.inc(endpoint='render_pool', type='BrokenProcessPool')
+            self._reset_pool(pool)
+            yield from self._render_local(stats_dict, analysis, image, names[done:])
+
+    def _render_local(self, stats_dict: dict, analysis: CombatStatsAnalysis, image: ImageOptions,
+                      names: Sequence[str]) -> Iterator[bytes]:
+        if analysis is None:
+            analysis = CombatStatsAnalysis(stats_dict)
+        for name in names:
+            img = render_figure(name, stats_dict, analysis, self.backend, image)
+            metrics.FIGURES_RENDERED.inc(figure=name, backend=self.backend)
+            yield img
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
@@ -0,0 +1,244 @@
+"""
+Render report bundles for many players offline: the three charts plus a summary.json each.
+
+    python reports.py 26Feb2025.csv --out reports --player Diver
+    python reports.py --db snapshots.db --out reports --workers 4 --format png8
+
+Every player gets <out>/<bundle name>/ with kill_distribution.png,
+combat_performance.png, rewards.png (or the chosen format) and summary.json.
+Bundle names depend only on the player name. summary.json is written last and
+records the render key of the stats, backend and image format it was made
+from, so a player whose bundle already has the current key is skipped: rerun
+an interrupted command and it continues where it stopped.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set
+
+from analysis import CombatStatsAnalysis
+from image_formats import IMAGE_FORMATS, ImageOptions
+from player_stats import TIME_FIELD, PlayerStats, from_array, from_columns, has_time_column
+from render_cache import stats_key
+from rendering import BACKENDS, FIGURE_INPUTS, render_figure, render_namespace, warm_worker
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FILE = 'summary.json'
+
+# tasks queued per worker, so a whole community is never held as futures at once
+TASKS_PER_WORKER = 4
+
+
+@dataclass
+class ReportTask:
+    player: str
+    stats: Dict[str, int]
+    directory: str
+    key: str
+    snapshot_date: Optional[str] = None
+
+
+def bundle_name(player: str) -> str:
+    """
+    Directory name of a player's bundle: a readable slug plus a hash of the exact
+    name, so names that slug alike ("Diver 1", "diver_1") do not share a bundle.
+    """
+    slug = re.sub(r'[^a-z0-9]+', '-', player.lower()).strip('-')[:40] or 'player'
+    return f"{slug}-{hashlib.sha256(player.encode()).hexdigest()[:8]}"
+
+
+def chart_files(image: ImageOptions) -> List[str]:
+    return [f"{name}.{image.extension}" for name in FIGURE_INPUTS]
+
+
+def _stats_dict(stats: PlayerStats, with_time: bool) -> Dict[str, int]:
+    stats_dict = stats.to_dict()
+    if not with_time:
+        stats_dict.pop(TIME_FIELD, None)
+    return stats_dict
+
+
+def csv_players(path: str, player: str = None) -> Iterator[tuple]:
+    """(player, stats dict, None) per row of a career stats CSV; rows without a player column are named row-<n>"""
+    from batch import player_column, read_stat_chunks
+
+    first_row = 0
+    with open(path, newline='') as source:
+        for chunk in read_stat_chunks(source):
+            column = player_column(chunk)
+            names = chunk[column].astype(str).tolist() if column else None
+            with_time = has_time_column(chunk)
+            for offset, stats in enumerate(from_array(from_columns(chunk))):
+                name = names[offset] if names else f"row-{first_row + offset}"
+                if player is None or name == player:
+                    yield name, _stats_dict(stats, with_time), None
+            first_row += len(chunk)
+
+
+def snapshot_players(db: str, player: str = None) -> Iterator[tuple]:
+    """(player, stats dict, snapshot date) of every player's latest snapshot"""
+    from snapshots import SnapshotStore
+
+    for row in SnapshotStore(db).latest(player):
+        stats = PlayerStats.from_mapping(row)
+        # the store keeps 0 for a snapshot without a recorded time
+        yield row['player'], _stats_dict(stats, stats.mission_seconds > 0), row['snapshot_date']
+
+
+def is_up_to_date(directory: str, key: str, image: ImageOptions) -> bool:
+    """the bundle was written from the same stats, backend and image options and is complete"""
+    try:
+        with open(os.path.join(directory, SUMMARY_FILE)) as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (summary.get('key') == key
+            and all(os.path.exists(os.path.join(directory, name)) for name in chart_files(image)))
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # a crash leaves the old file or a stray .tmp, never a truncated output
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_bundle(task: ReportTask, backend: str, image: ImageOptions) -> str:
+    """render one player's charts and summary into task.directory; runs in the pool workers"""
+    os.makedirs(task.directory, exist_ok=True)
+    analysis = CombatStatsAnalysis(task.stats)
+    for name, filename in zip(FIGURE_INPUTS, chart_files(image)):
+        _write_atomic(os.path.join(task.directory, filename),
+                      render_figure(name, task.stats, analysis, backend, image))
+    summary = {
+        'player': task.player,
+        'snapshot_date': task.snapshot_date,
+        'key': task.key,
+        'backend': backend,
+        'image_format': image.format,
+        'charts': chart_files(image),
+        'stats': task.stats,
+        'analysis': analysis.to_dict(),
+    }
+    _write_atomic(os.path.join(task.directory, SUMMARY_FILE), json.dumps(summary, indent=2).encode())
+    return task.player
+
+
+class ReportRun:
+    """Counts and timing of one run, for the throughput report."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rendered = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def result(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            'players': self.rendered + self.skipped + self.failed,
+            'rendered': self.rendered,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'seconds': round(elapsed, 3),
+            'players_per_second': round(self.rendered / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+def render_reports(players: Iterator[tuple], out: str, backend: str = 'matplotlib',
+                   image: ImageOptions = ImageOptions(), workers: int = 0, force: bool = False,
+                   start_method: str = 'spawn') -> dict:
+    """
+    Write a bundle for every (player, stats, snapshot date) not already up to date.
+
+    workers > 0 renders on a process pool of that size, one player per task.
+    Returns the counts and players/sec of the run.
+    """
+    run = ReportRun()
+    namespace = render_namespace(backend, image)
+
+    def tasks() -> Iterator[ReportTask]:
+        for player, stats, snapshot_date in players:
+            key = stats_key(dict(stats, player=player, snapshot_date=snapshot_date or ''), namespace=namespace)
+            directory = os.path.join(out, bundle_name(player))
+            if not force and is_up_to_date(directory, key, image):
+                run.skipped += 1
+                continue
+            yield ReportTask(player, stats, directory, key, snapshot_date)
+
+    def done(player: str, error: Optional[BaseException]) -> None:
+        if error is None:
+            run.rendered += 1
+        else:
+            run.failed += 1
+            logger.error("report for %r failed: %s: %s", player, type(error).__name__, error)
+
+    if workers <= 0:
+        for task in tasks():
+            try:
+                write_bundle(task, backend, image)
+                done(task.player, None)
+            except Exception as e:
+                done(task.player, e)
+        return run.result()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method),
+                             initializer=warm_worker, initargs=(backend,)) as pool:
+        pending: Dict[Future, str] = {}
+
+        def collect(finished: Set[Future]) -> None:
+            for future in finished:
+                done(pending.pop(future), future.exception())
+
+        for task in tasks():
+            if len(pending) >= workers * TASKS_PER_WORKER:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            pending[pool.submit(write_bundle, task, backend, image)] = task.player
+        collect(wait(pending)[0])
+    return run.result()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='?', help='career stats CSV (one player per row)')
+    parser.add_argument('--db', help='snapshot store; the latest snapshot of every player is rendered')
+    parser.add_argument('--player', help='only this player')
+    parser.add_argument('--out', default='reports', help='output directory')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='render processes (0 renders in this process)')
+    parser.add_argument('--backend', choices=BACKENDS, default=os.environ.get('RENDER_BACKEND', 'matplotlib'))
+    parser.add_argument('--format', choices=list(IMAGE_FORMATS), default=os.environ.get('IMAGE_FORMAT', 'png'))
+    parser.add_argument('--dpi', type=int, default=int(os.environ.get('IMAGE_DPI', 100)))
+    parser.add_argument('--force', action='store_true', help='render up-to-date bundles again')
+    parser.add_argument('--json', action='store_true', help='print the run report as JSON')
+    args = parser.parse_args()
+    if (args.csv is None) == (args.db is None):
+        parser.error("give either a CSV file or --db")
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    players = csv_players(args.csv, args.player) if args.csv else snapshot_players(args.db, args.player)
+    result = render_reports(players, args.out, args.backend, ImageOptions(format=args.format, dpi=args.dpi),
+                            workers=args.workers, force=args.force)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['players']} player(s): {result['rendered']} rendered, {result['skipped']} up to date, "
+              f"{result['failed']} failed in {result['seconds']:.1f}s "
+              f"({result['players_per_second']:.1f} players/s)")
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
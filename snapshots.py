@@ -0,0 +1,205 @@
+"""
+Local store of dated career stat snapshots (e.g. 26Feb2025.csv) in SQLite.
+
+Snapshots are keyed by (player, snapshot_date); the primary key doubles as the
+index behind the "latest per player" and "delta between two dates" queries.
+
+    python snapshots.py ingest 26Feb2025.csv --player Diver
+    python snapshots.py latest
+    python snapshots.py delta Diver --from 2025-02-26 --to 2025-03-26
+"""
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from analysis import STAT_FIELDS, TIME_FIELD
+from batch import player_column, read_stat_chunks
+from player_stats import from_columns
+
+# counters stored per snapshot, in column order
+SNAPSHOT_FIELDS = STAT_FIELDS + [TIME_FIELD]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS snapshots (
+    player TEXT NOT NULL,
+    snapshot_date TEXT NOT NULL,
+    {', '.join(f'{field} INTEGER NOT NULL DEFAULT 0' for field in SNAPSHOT_FIELDS)},
+    PRIMARY KEY (player, snapshot_date)
+) WITHOUT ROWID
+"""
+
+
+def date_from_filename(path: str) -> datetime.date:
+    """snapshot date from an export name like 26Feb2025.csv"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    try:
+        return datetime.datetime.strptime(stem, '%d%b%Y').date()
+    except ValueError:
+        raise ValueError(f"cannot read a date from {os.path.basename(path)!r}, pass one explicitly")
+
+
+class SnapshotStore:
+    """Thin wrapper over one SQLite file; a connection is opened per call so threads can share it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def ingest_csv(self, source, snapshot_date: datetime.date = None, player: str = None,
+                   chunk_rows: int = 10_000) -> int:
+        """
+        Store every row of a career stats CSV as a snapshot, replacing an
+        existing (player, date) snapshot. Returns the number of rows stored.
+
+        Args:
+            source: path or file-like object in the 26Feb2025.csv layout
+            snapshot_date: defaults to the date in the file name
+            player: name for exports without a player column (single player dumps)
+        """
+        if snapshot_date is None:
+            snapshot_date = date_from_filename(source)
+        day = snapshot_date.isoformat()
+
+        placeholders = ', '.join('?' * (len(SNAPSHOT_FIELDS) + 2))
+        insert = f"INSERT OR REPLACE INTO snapshots (player, snapshot_date, {', '.join(SNAPSHOT_FIELDS)}) " \
+                 f"VALUES ({placeholders})"
+        stored = 0
+        with closing(self._connect()) as conn, conn:
+            for chunk in read_stat_chunks(source, chunk_rows):
+                array = from_columns(chunk)
+                players = self._player_names(chunk, player)
+                # a snapshot without a recorded time keeps 0
+                array[TIME_FIELD] = np.maximum(array[TIME_FIELD], 0)
+                values = [array[field].tolist() for field in SNAPSHOT_FIELDS]
+                conn.executemany(insert, ((name, day, *row) for name, *row in zip(players, *values)))
+                stored += len(chunk)
+        return stored
+
+    @staticmethod
+    def _player_names(chunk, player: Optional[str]) -> Iterable[str]:
+        column = player_column(chunk)
+        if column is not None:
+            return chunk[column].astype(str).tolist()
+        if player is None:
+            raise ValueError("the CSV has no player column, pass a player name")
+        if len(chunk) > 1:
+            raise ValueError("a CSV without a player column must hold a single player")
+        return [player]
+
+    def players(self) -> List[str]:
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT player FROM snapshots ORDER BY player")]
+
+    def dates(self, player: str) -> List[str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT snapshot_date FROM snapshots WHERE player = ? ORDER BY snapshot_date",
+                                (player,))
+            return [row[0] for row in rows]
+
+    def snapshot(self, player: str, snapshot_date: str) -> Optional[dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM snapshots WHERE player = ? AND snapshot_date = ?",
+                               (player, snapshot_date)).fetchone()
+            return dict(row) if row is not None else None
+
+    def latest(self, player: str = None) -> List[dict]:
+        """latest snapshot of every player (or of one player), one index seek per player"""
+        query = """
+            SELECT s.* FROM snapshots s
+            JOIN (SELECT player, MAX(snapshot_date) AS snapshot_date FROM snapshots
+                  {where} GROUP BY player) latest
+              ON s.player = latest.player AND s.snapshot_date = latest.snapshot_date
+            ORDER BY s.player
+        """
+        with closing(self._connect()) as conn:
+            if player is None:
+                rows = conn.execute(query.format(where=''))
+            else:
+                rows = conn.execute(query.format(where='WHERE player = ?'), (player,))
+            return [dict(row) for row in rows]
+
+    def delta(self, player: str, start: str = None, end: str = None) -> Optional[dict]:
+        """
+        Difference of every counter between two snapshots of a player.
+
+        Args:
+            start: earlier snapshot date (ISO); defaults to the snapshot before `end`
+            end: later snapshot date (ISO); defaults to the latest snapshot
+        Returns:
+            {'player', 'from', 'to', 'stats': {field: end - start}} or None when
+            the player does not have both snapshots
+        """
+        with closing(self._connect()) as conn:
+            if end is None:
+                row = conn.execute("SELECT MAX(snapshot_date) FROM snapshots WHERE player = ?",
+                                   (player,)).fetchone()
+                end = row[0]
+            if start is None and end is not None:
+                row = conn.execute("SELECT MAX(snapshot_date) FROM snapshots WHERE player = ? AND snapshot_date < ?",
+                                   (player, end)).fetchone()
+                start = row[0]
+            if start is None or end is None:
+                return None
+
+            diffs = ', '.join(f'b.{f} - a.{f} AS {f}' for f in SNAPSHOT_FIELDS)
+            row = conn.execute(f"""
+                SELECT {diffs} FROM snapshots a JOIN snapshots b ON b.player = a.player
+                WHERE a.player = ? AND a.snapshot_date = ? AND b.snapshot_date = ?
+            """, (player, start, end)).fetchone()
+            if row is None:
+                return None
+            return {'player': player, 'from': start, 'to': end, 'stats': dict(row)}
+
+
+def delta_stats(delta: dict) -> Dict[str, int]:
+    """the stats dict of a delta, ready for the analysis (no time field when none was recorded)"""
+    stats = {field: delta['stats'][field] for field in STAT_FIELDS}
+    if delta['stats'][TIME_FIELD] > 0:
+        stats[TIME_FIELD] = delta['stats'][TIME_FIELD]
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=os.environ.get('SNAPSHOT_DB', 'snapshots.db'), help='SQLite file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='store CSV snapshots')
+    ingest.add_argument('csv', nargs='+')
+    ingest.add_argument('--player', help='name for exports without a player column')
+    ingest.add_argument('--date', type=datetime.date.fromisoformat, help='snapshot date, default from file name')
+
+    latest = commands.add_parser('latest', help='latest snapshot per player')
+    latest.add_argument('player', nargs='?')
+
+    delta = commands.add_parser('delta', help='counters gained between two snapshots')
+    delta.add_argument('player')
+    delta.add_argument('--from', dest='start')
+    delta.add_argument('--to', dest='end')
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.db)
+    if args.command == 'ingest':
+        for path in args.csv:
+            rows = store.ingest_csv(path, args.date, args.player)
+            print(f"{path}: {rows} snapshot(s)")
+    elif args.command == 'latest':
+        print(json.dumps(store.latest(args.player), indent=2))
+    else:
+        print(json.dumps(store.delta(args.player, args.start, args.end), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Background warm-up and readiness.
+
+The app serves `/` as soon as it is imported; heavy modules load on first use.
+A Warmup runs the slow first-use work (imports, a dummy render, loading the
+percentile index) on a thread and reports ready once it is done, so a load
+balancer can hold traffic for /analyze until then.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Named start-up steps run in order on a background thread."""
+
+    def __init__(self):
+        # ready unless a warm-up is running: with no warm-up everything loads on first use
+        self._ready = threading.Event()
+        self._ready.set()
+        self._thread: Optional[threading.Thread] = None
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def run(self, steps: Dict[str, Callable[[], object]]) -> None:
+        """
+        Run every step, recording its duration. A failing step is logged and
+        reported by status() but does not keep the app from becoming ready;
+        the same work is retried on first use.
+        """
+        self._ready.clear()
+        try:
+            for name, step in steps.items():
+                start = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    logger.exception("warm-up step %s failed", name)
+                    self.errors[name] = f"{type(e).__name__}: {e}"
+                self.timings[name] = time.perf_counter() - start
+        finally:
+            self._ready.set()
+
+    def start(self, steps: Dict[str, Callable[[], object]]) -> threading.Thread:
+        """run the steps on a daemon thread; not ready until they finish"""
+        self._ready.clear()
+        self._thread = threading.Thread(target=self.run, args=(steps,), name='warmup', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def status(self) -> dict:
+        return {
+            'ready': self.ready,
+            'steps': {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            'errors': dict(self.errors),
+        }